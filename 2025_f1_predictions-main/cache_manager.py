@@ -0,0 +1,159 @@
+"""
+Size-budgeted eviction for f1_cache.
+
+fastf1.Cache.enable_cache("f1_cache") never deletes anything, so with telemetry
+for a few seasons the folder grows to gigabytes. CacheManager keeps the .ff1pkl
+files under a byte budget and evicts either by least-recent use ("lru") or by
+least value ("value"): telemetry and position data go first, while
+driver_info, session_info and the lap timing data are kept as long as possible.
+Evicted payloads are simply downloaded again the next time a session needs them.
+
+Usage:
+    python cache_manager.py --budget 2GB --policy value
+    F1_CACHE_BUDGET=2GB python prediction20.py      # enforced by session_loader
+"""
+import argparse
+import json
+import os
+import time
+
+from cache_manifest import CACHE_DIR, load_manifest, session_dir_key, write_manifest
+
+STATS_NAME = "cache_stats.json"
+POLICIES = ("lru", "value")
+
+# how much a cache file is worth keeping; lowest goes first under the "value" policy
+FILE_VALUE = {
+    "car_data": 0,
+    "position_data": 0,
+    "race_control_messages": 1,
+    "weather_data": 1,
+    "session_status_data": 2,
+    "track_status_data": 2,
+    "timing_app_data": 3,
+    "_extended_timing_data": 3,
+    "lap_count": 4,
+    "session_info": 4,
+    "driver_info": 4,
+}
+UNKNOWN_VALUE = 1
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30, "TB": 1 << 40}
+
+
+def parse_size(text):
+    """Parse sizes like "500MB", "2GB" or "1048576" into bytes."""
+    text = str(text).strip().upper()
+    number = text.rstrip("KMGTB")
+    unit = text[len(number):]
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {text!r}")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+class CacheManager:
+    """Tracks use of the FastF1 cache and keeps it under a byte budget."""
+
+    def __init__(self, cache_dir=CACHE_DIR, budget_bytes=None, policy="value"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}, expected one of {POLICIES}")
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.policy = policy
+        self.stats_path = os.path.join(cache_dir, STATS_NAME)
+        self._stats = self._read_stats()
+
+    def _read_stats(self):
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_saved": 0, "last_access": {}}
+        if os.path.exists(self.stats_path):
+            with open(self.stats_path) as f:
+                stats.update(json.load(f))
+        return stats
+
+    def _write_stats(self):
+        with open(self.stats_path + ".tmp", "w") as f:
+            json.dump(self._stats, f, indent=1, sort_keys=True)
+        os.replace(self.stats_path + ".tmp", self.stats_path)
+
+    def stats(self):
+        """Hits, misses, evictions and bytes freed by evictions so far."""
+        return {k: v for k, v in self._stats.items() if k != "last_access"}
+
+    def record_load(self, session, hit):
+        """Count a session load as a cache hit or miss and mark it as recently used."""
+        self._stats["hits" if hit else "misses"] += 1
+        self._stats["last_access"][session_dir_key(session)] = time.time()
+        self._write_stats()
+
+    def cached_files(self):
+        """List (session key, file name, path, size) for every .ff1pkl in the cache."""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".ff1pkl"):
+                    continue
+                path = os.path.join(root, name)
+                key = os.path.relpath(root, self.cache_dir).replace(os.sep, "/")
+                files.append((key, name, path, os.path.getsize(path)))
+        return files
+
+    def usage(self):
+        return sum(size for _, _, _, size in self.cached_files())
+
+    def _eviction_order(self, files):
+        last_access = self._stats["last_access"]
+
+        def recency(item):
+            # sessions never seen through the manager count as oldest, by file mtime
+            return last_access.get(item[0], os.path.getmtime(item[2]) - 1e10)
+
+        def value(item):
+            return FILE_VALUE.get(item[1][:-len(".ff1pkl")], UNKNOWN_VALUE)
+
+        if self.policy == "lru":
+            return sorted(files, key=lambda item: (recency(item), value(item)))
+        return sorted(files, key=lambda item: (value(item), recency(item)))
+
+    def enforce(self, budget_bytes=None):
+        """Evict files until the cache fits the budget. Returns the evicted paths."""
+        budget = self.budget_bytes if budget_bytes is None else budget_bytes
+        if budget is None:
+            return []
+        files = self.cached_files()
+        total = sum(size for _, _, _, size in files)
+        if total <= budget:
+            return []
+
+        manifest = load_manifest(self.cache_dir)
+        sessions = {key: dict(entry) for key, entry in manifest["sessions"].items()}
+        evicted = []
+        for key, name, path, size in self._eviction_order(files):
+            if total <= budget:
+                break
+            os.remove(path)
+            total -= size
+            evicted.append(path)
+            self._stats["evictions"] += 1
+            self._stats["bytes_saved"] += size
+            if key in sessions:
+                sessions[key]["files"] = {n: f for n, f in sessions[key]["files"].items() if n != name}
+
+        # keep the manifest honest so warm checks report the evicted payloads as missing
+        write_manifest({**manifest, "sessions": sessions}, self.cache_dir)
+        self._write_stats()
+        return evicted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep f1_cache under a size budget")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--budget", help="e.g. 500MB or 2GB; omit to only print usage and stats")
+    parser.add_argument("--policy", choices=POLICIES, default="value")
+    args = parser.parse_args()
+
+    manager = CacheManager(args.cache, parse_size(args.budget) if args.budget else None, args.policy)
+    evicted = manager.enforce()
+    for path in evicted:
+        print(f"evicted {path}")
+    print(f"Cache usage: {manager.usage() / (1 << 20):.1f} MB")
+    print(json.dumps(manager.stats(), indent=1))
@@ -0,0 +1,289 @@
+"""
+Manifest of what is in the FastF1 cache.
+
+f1_cache/manifest.json lists every cached session directory
+(e.g. 2024/2024-10-20_United_States_Grand_Prix/2024-10-20_Race) with each
+.ff1pkl file's size, sha256 hash and FastF1 schema version. Checking whether a
+round is fully cached then only needs the manifest and a few stat calls
+instead of a session.load() that may go to the network.
+
+Usage:
+    python cache_manifest.py                     # (re)build the manifest
+    python cache_manifest.py --verify            # rehash and report corrupt files
+    is_round_cached(2024, 19, "R")
+"""
+import argparse
+import hashlib
+import json
+import numbers
+import os
+import pickle
+
+CACHE_DIR = "f1_cache"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# session names as they appear in f1_cache -> short identifiers used by get_session
+SESSION_CODES = {
+    "Race": "R", "Qualifying": "Q", "Sprint": "S",
+    "Sprint Qualifying": "SQ", "Sprint Shootout": "SQ",
+    "Practice 1": "FP1", "Practice 2": "FP2", "Practice 3": "FP3",
+}
+
+# cache files FastF1 needs for each load profile (see session_loader.PROFILES)
+LAP_FILES = [
+    "session_info", "driver_info", "session_status_data", "track_status_data",
+    "_extended_timing_data", "timing_app_data",
+]
+PROFILE_FILES = {
+    "laps": LAP_FILES,
+    "laps+weather": LAP_FILES + ["weather_data"],
+    "laps+telemetry": LAP_FILES + ["car_data", "position_data"],
+    "full": LAP_FILES + ["weather_data", "race_control_messages", "car_data", "position_data"],
+}
+# races and sprints also need the lap count
+RACE_FILES = ["lap_count"]
+
+_manifest_memo = {}
+
+
+def session_code(identifier):
+    """Return the short session identifier ("R", "Q", "FP2", ...) for a name or code."""
+    if identifier in SESSION_CODES:
+        return SESSION_CODES[identifier]
+    code = str(identifier).upper()
+    if code == "SPRINT":
+        return "S"
+    return code
+
+
+def required_files(identifier, profile="laps"):
+    names = list(PROFILE_FILES[profile])
+    if session_code(identifier) in ("R", "S"):
+        names += RACE_FILES
+    return [f"{name}.ff1pkl" for name in names]
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _schema_version(path):
+    # FastF1 pickles {"version": <api core version>, "data": ...}
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+        return cached.get("version")
+    except Exception:
+        return None
+
+
+def _describe_files(session_path, previous=None):
+    """Describe the .ff1pkl files in one session directory, reusing hashes of unchanged files."""
+    previous = previous or {}
+    files = {}
+    for name in sorted(os.listdir(session_path)):
+        if not name.endswith(".ff1pkl"):
+            continue
+        path = os.path.join(session_path, name)
+        stat = os.stat(path)
+        old = previous.get(name)
+        if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            files[name] = old
+            continue
+        files[name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _hash_file(path),
+            "schema": _schema_version(path),
+        }
+    return files
+
+
+def _cached_round(session_path):
+    """Round number from a cached session's own session_info (its Meeting "Number"), or None."""
+    try:
+        with open(os.path.join(session_path, "session_info.ff1pkl"), "rb") as f:
+            return int(pickle.load(f)["data"]["Meeting"]["Number"])
+    except Exception:
+        return None
+
+
+def manifest_path(cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, MANIFEST_NAME)
+
+
+def load_manifest(cache_dir=CACHE_DIR):
+    """Read the manifest, memoized until the file changes on disk."""
+    path = manifest_path(cache_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {"format": MANIFEST_FORMAT, "sessions": {}}
+    memo = _manifest_memo.get(path)
+    if memo and memo[0] == mtime:
+        return memo[1]
+    with open(path) as f:
+        manifest = json.load(f)
+    _manifest_memo[path] = (mtime, manifest)
+    return manifest
+
+
+def write_manifest(manifest, cache_dir=CACHE_DIR):
+    path = manifest_path(cache_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def build_manifest(cache_dir=CACHE_DIR):
+    """
+    Walk the whole cache and write a fresh manifest. Unchanged files are not rehashed.
+
+    Round numbers are read from each session's cached session_info, so the
+    build never needs the network.
+    """
+    import fastf1
+
+    old_sessions = load_manifest(cache_dir)["sessions"]
+    sessions = {}
+    for year in sorted(os.listdir(cache_dir)):
+        year_dir = os.path.join(cache_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for event_dir in sorted(os.listdir(year_dir)):
+            event_path = os.path.join(year_dir, event_dir)
+            if not os.path.isdir(event_path):
+                continue
+            event_name = event_dir.split("_", 1)[1].replace("_", " ")
+            for session_dir in sorted(os.listdir(event_path)):
+                session_path = os.path.join(event_path, session_dir)
+                if not os.path.isdir(session_path):
+                    continue
+                key = f"{year}/{event_dir}/{session_dir}"
+                old = old_sessions.get(key, {})
+                round_number = old.get("round")
+                if round_number is None:
+                    round_number = _cached_round(session_path)
+                sessions[key] = {
+                    "year": int(year),
+                    "round": round_number,
+                    "event": event_name,
+                    "session": session_code(session_dir.split("_", 1)[1].replace("_", " ")),
+                    "files": _describe_files(session_path, old.get("files")),
+                }
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "fastf1_version": fastf1.__version__,
+        "sessions": sessions,
+    }
+    write_manifest(manifest, cache_dir)
+    return manifest
+
+
+def session_dir_key(session):
+    """Manifest key of a FastF1 session, e.g. 2024/2024-10-20_United_States_Grand_Prix/2024-10-20_Race."""
+    # api_path looks like /static/2024/2024-10-20_United_States_Grand_Prix/2024-10-20_Race/
+    return session.api_path.strip("/").split("/", 1)[1]
+
+
+def record_session(session, cache_dir=CACHE_DIR):
+    """Add or refresh the manifest entry of a session that was just loaded."""
+    key = session_dir_key(session)
+    session_path = os.path.join(cache_dir, *key.split("/"))
+    if not os.path.isdir(session_path):
+        return None
+    manifest = load_manifest(cache_dir)
+    old = manifest["sessions"].get(key, {})
+    entry = {
+        "year": int(key.split("/", 1)[0]),
+        "round": int(session.event["RoundNumber"]),
+        "event": session.event["EventName"],
+        "session": session_code(session.name),
+        "files": _describe_files(session_path, old.get("files")),
+    }
+    manifest = {**manifest, "sessions": {**manifest["sessions"], key: entry}}
+    write_manifest(manifest, cache_dir)
+    return entry
+
+
+def find_session(year, gp, identifier, cache_dir=CACHE_DIR):
+    """Return (key, entry) of a cached session by round number or full event name, or (None, None)."""
+    code = session_code(identifier)
+    for key, entry in load_manifest(cache_dir)["sessions"].items():
+        if entry["year"] != int(year) or entry["session"] != code:
+            continue
+        if isinstance(gp, numbers.Integral) and entry["round"] == int(gp):
+            return key, entry
+        if isinstance(gp, str) and gp.lower() == entry["event"].lower():
+            return key, entry
+    return None, None
+
+
+def is_round_cached(year, gp, identifier="R", profile="laps", cache_dir=CACHE_DIR, verify=False):
+    """
+    True if every cache file the profile needs is present with its recorded size.
+
+    Only the manifest and one stat call per file are touched; pass verify=True to
+    also rehash the files.
+    """
+    key, entry = find_session(year, gp, identifier, cache_dir)
+    if key is None:
+        return False
+    session_path = os.path.join(cache_dir, *key.split("/"))
+    for name in required_files(identifier, profile):
+        described = entry["files"].get(name)
+        if described is None:
+            return False
+        path = os.path.join(session_path, name)
+        try:
+            if os.stat(path).st_size != described["size"]:
+                return False
+        except FileNotFoundError:
+            return False
+        if verify and _hash_file(path) != described["sha256"]:
+            return False
+    return True
+
+
+def require_cached(year, gp, identifier="R", profile="laps", cache_dir=CACHE_DIR):
+    """Raise FileNotFoundError straight away if a session is not fully cached."""
+    if not is_round_cached(year, gp, identifier, profile, cache_dir):
+        raise FileNotFoundError(
+            f"{year} {gp} {identifier} ({profile}) is not fully cached in {cache_dir} "
+            f"and offline mode is on; run prefetch.py or cache_manifest.py first"
+        )
+
+
+def verify_manifest(cache_dir=CACHE_DIR):
+    """Rehash every file listed in the manifest. Returns the paths that are missing or changed."""
+    bad = []
+    for key, entry in load_manifest(cache_dir)["sessions"].items():
+        for name, described in entry["files"].items():
+            path = os.path.join(cache_dir, *key.split("/"), name)
+            if not os.path.exists(path) or _hash_file(path) != described["sha256"]:
+                bad.append(path)
+    return bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify the f1_cache manifest")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--verify", action="store_true", help="rehash files against the existing manifest")
+    args = parser.parse_args()
+
+    if args.verify:
+        bad = verify_manifest(args.cache)
+        for path in bad:
+            print(f"missing or changed: {path}")
+        print(f"{len(bad)} problem(s) found")
+        raise SystemExit(1 if bad else 0)
+
+    manifest = build_manifest(args.cache)
+    n_files = sum(len(entry["files"]) for entry in manifest["sessions"].values())
+    print(f"Manifest written for {len(manifest['sessions'])} session(s), {n_files} file(s)")
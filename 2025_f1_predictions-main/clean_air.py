@@ -0,0 +1,114 @@
+"""
+Clean-air pace, computed from the lap store.
+
+Replaces the hand-edited clean_air_race_pace dicts ("from racepace.py"). A lap
+counts as clean air when the car crossed the line at least GAP_THRESHOLD
+seconds after the car directly ahead on track, it is not an in/out lap or the
+first lap, it was run under green flags (no SC, VSC or red flag in
+TrackStatus) and it is within SLOW_LAP_RATIO of the session's fastest clean
+lap. Everything is done with NumPy over all sessions at once, so a whole
+season costs about as much as one race.
+
+    clean_air_race_pace = driver_clean_air_pace(2024, 8)        # {"VER": 78.9, ...}
+    pace = season_clean_air_pace([2023, 2024])                  # Year, Round, Driver, CleanAirPace (s), CleanAirLaps
+"""
+import numpy as np
+import pandas as pd
+
+from features import cached, ensure_stored, input_hash
+from lap_store import STORE_DIR, load_history, load_laps
+
+GAP_THRESHOLD = 2.0
+SLOW_LAP_RATIO = 1.07
+# track status codes: 4 safety car, 5 red flag, 6 VSC deployed, 7 VSC ending
+NEUTRALISED_STATUS = "4567"
+
+COLUMNS = ["Driver", "LapNumber", "LapTime", "Time", "PitInTime", "PitOutTime", "TrackStatus"]
+
+
+def _factorize(*keys):
+    """Dense integer ids for the combinations of several key columns."""
+    ids, _ = pd.MultiIndex.from_arrays([np.asarray(k) for k in keys]).factorize()
+    return ids
+
+
+def gap_to_car_ahead(session_ids, crossing_times):
+    """Seconds since the previous car crossed the line in the same session (inf for the first one)."""
+    order = np.lexsort((crossing_times, session_ids))
+    times = crossing_times[order]
+    sessions = session_ids[order]
+    gaps = np.full(len(times), np.inf)
+    gaps[1:] = times[1:] - times[:-1]
+    gaps[1:][sessions[1:] != sessions[:-1]] = np.inf
+    out = np.empty_like(gaps)
+    out[order] = gaps
+    return out
+
+
+def _neutralised(track_status):
+    status = pd.Categorical(track_status)
+    bad = np.array([any(code in str(s) for code in NEUTRALISED_STATUS) for s in status.categories] + [False])
+    return bad[status.codes]  # code -1 (missing) picks the trailing False
+
+
+def clean_air_mask(laps, session_ids, gap_threshold=GAP_THRESHOLD, slow_lap_ratio=SLOW_LAP_RATIO):
+    """Boolean mask of the laps that count towards clean-air pace."""
+    lap_time = laps["LapTime (s)"].to_numpy(dtype=np.float64, na_value=np.nan)
+    crossing = laps["Time (s)"].to_numpy(dtype=np.float64, na_value=np.nan)
+    gaps = gap_to_car_ahead(session_ids, crossing)
+    if "IntervalAhead (s)" in laps.columns:
+        # intervals to the car ahead in position win over gaps to whichever car crossed last
+        interval = laps["IntervalAhead (s)"].to_numpy(dtype=np.float64, na_value=np.nan)
+        gaps = np.where(np.isnan(interval), gaps, interval)
+
+    mask = (
+        np.isfinite(lap_time)
+        & (gaps >= gap_threshold)
+        & laps["PitInTime (s)"].isna().to_numpy()
+        & laps["PitOutTime (s)"].isna().to_numpy()
+        & (laps["LapNumber"].to_numpy(dtype=np.float64, na_value=np.nan) > 1)
+        & ~_neutralised(laps["TrackStatus"])
+    )
+
+    # drop laps far off the session's fastest clean lap (traffic we could not see, mistakes)
+    fastest = np.full(session_ids.max() + 1 if len(session_ids) else 0, np.inf)
+    np.fmin.at(fastest, session_ids[mask], lap_time[mask])
+    return mask & (lap_time <= fastest[session_ids] * slow_lap_ratio)
+
+
+def clean_air_pace(laps, by=("Year", "Round"), gap_threshold=GAP_THRESHOLD):
+    """Mean clean-air lap time per session and driver for any number of sessions at once."""
+    keys = [column for column in by if column in laps.columns]
+    session_ids = _factorize(*[laps[k] for k in keys]) if keys else np.zeros(len(laps), dtype=np.int64)
+    mask = clean_air_mask(laps, session_ids, gap_threshold)
+
+    group_ids = _factorize(session_ids, laps["Driver"].astype(str))
+    n_groups = group_ids.max() + 1 if len(group_ids) else 0
+    lap_time = laps["LapTime (s)"].to_numpy(dtype=np.float64, na_value=0.0)
+    counts = np.bincount(group_ids[mask], minlength=n_groups)
+    totals = np.bincount(group_ids[mask], weights=lap_time[mask], minlength=n_groups)
+
+    # first row of every group carries its key values
+    first = np.unique(group_ids, return_index=True)[1]
+    result = laps.iloc[first][keys + ["Driver"]].reset_index(drop=True)
+    result["Driver"] = result["Driver"].astype(str)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["CleanAirPace (s)"] = totals / counts
+    result["CleanAirLaps"] = counts
+    return result[result["CleanAirLaps"] > 0].reset_index(drop=True)
+
+
+def driver_clean_air_pace(year, gp, identifier="R", gap_threshold=GAP_THRESHOLD, store_dir=STORE_DIR):
+    """{driver: clean-air pace} for one session, cached like the other features."""
+    ensure_stored(year, gp, identifier, store_dir)
+    key = f"{input_hash(year, gp, identifier, COLUMNS, store_dir=store_dir)}:{gap_threshold}"
+    pace = cached(
+        "clean_air_pace", key,
+        lambda: clean_air_pace(load_laps(year, gp, identifier, COLUMNS, store_dir=store_dir), gap_threshold=gap_threshold),
+    )
+    return dict(zip(pace["Driver"], pace["CleanAirPace (s)"].round(6)))
+
+
+def season_clean_air_pace(years, identifier="R", gap_threshold=GAP_THRESHOLD, store_dir=STORE_DIR):
+    """Clean-air pace of every stored session in the given seasons, in one batch."""
+    return clean_air_pace(load_history(years, identifier, COLUMNS, store_dir=store_dir), gap_threshold=gap_threshold)
@@ -0,0 +1,150 @@
+"""
+Tyre degradation rates fitted per stint.
+
+Every session is split into stints (driver + Stint number) and a straight line
+LapTime = a + b * TyreLife is fitted to each one. All stints of all sessions
+are solved together: the least-squares sums come from np.bincount over a
+stint id, so a full season of races is a handful of array passes rather than
+thousands of small fits. Slopes (seconds lost per lap of tyre age) are then
+averaged per driver and compound, weighted by stint length.
+
+Only green-flag laps count, in/out laps and lap 1 are dropped, and so are laps
+more than OUTLIER_RATIO slower than their stint's median (traffic, mistakes).
+Fuel burn makes laps faster as a stint goes on, so raw slopes understate wear;
+the fuel-corrected lap times (fuel.py) are used whenever they are stored.
+
+Usage:
+    python degradation.py 2024                            # per-driver, per-compound table
+    rates = driver_degradation(2024, "Qatar")             # Driver, Compound, DegradationRate (s/lap), Stints, Laps
+    tyre_wear = circuit_degradation("Qatar", [2023, 2024], drivers)   # {driver: s/lap}
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from clean_air import NEUTRALISED_STATUS
+from features import cached, ensure_stored, input_hash
+from fuel import COLUMN as FUEL_COLUMN, has_fuel_correction
+from lap_store import STORE_DIR, list_sessions, load_history, load_laps
+
+MIN_STINT_LAPS = 5
+OUTLIER_RATIO = 1.05
+
+COLUMNS = ["Driver", "LapNumber", "Stint", "Compound", "TyreLife", "LapTime", "PitInTime", "PitOutTime", "TrackStatus"]
+
+
+def _stint_laps(laps, time_column):
+    """Green-flag, non-pit laps with a usable tyre age, tagged with a dense stint id."""
+    status = laps["TrackStatus"].astype(str)
+    keep = (
+        laps[time_column].notna()
+        & laps["TyreLife"].notna()
+        & laps["Stint"].notna()
+        & laps["PitInTime (s)"].isna()
+        & laps["PitOutTime (s)"].isna()
+        & (laps["LapNumber"].fillna(0) > 1)
+        & ~status.str.contains(f"[{NEUTRALISED_STATUS}]", regex=True)
+    ).to_numpy()
+    laps = laps[keep]
+    keys = [c for c in ("Year", "Round") if c in laps.columns] + ["Driver", "Stint"]
+    stint_ids, _ = pd.MultiIndex.from_arrays([laps[k].astype(str) if k == "Driver" else laps[k] for k in keys]).factorize()
+    return laps, keys, stint_ids
+
+
+def _time_column(laps):
+    """Fuel-corrected lap times when the laps carry them, raw lap times otherwise."""
+    return f"{FUEL_COLUMN} (s)" if f"{FUEL_COLUMN} (s)" in laps.columns else "LapTime (s)"
+
+
+def stint_fits(laps, time_column=None, min_laps=MIN_STINT_LAPS):
+    """Slope and intercept of lap time against tyre age for every stint, solved in one batch."""
+    time_column = time_column or _time_column(laps)
+    laps, keys, stint_ids = _stint_laps(laps, time_column)
+    x = laps["TyreLife"].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = laps[time_column].to_numpy(dtype=np.float64, na_value=np.nan)
+    n_stints = stint_ids.max() + 1 if len(stint_ids) else 0
+
+    # drop outliers against each stint's median lap
+    order = np.lexsort((y, stint_ids))
+    counts = np.bincount(stint_ids, minlength=n_stints)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    medians = y[order][starts + (counts - 1) // 2] if n_stints else np.empty(0)
+    inlier = y <= medians[stint_ids] * OUTLIER_RATIO
+    ids, x, y = stint_ids[inlier], x[inlier], y[inlier]
+
+    n = np.bincount(ids, minlength=n_stints).astype(np.float64)
+    sx = np.bincount(ids, weights=x, minlength=n_stints)
+    sy = np.bincount(ids, weights=y, minlength=n_stints)
+    sxx = np.bincount(ids, weights=x * x, minlength=n_stints)
+    sxy = np.bincount(ids, weights=x * y, minlength=n_stints)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sxy - sx * sy) / denominator
+        intercept = (sy - slope * sx) / n
+
+    first = np.unique(stint_ids, return_index=True)[1]
+    fits = laps.iloc[first][keys + ["Compound"]].reset_index(drop=True)
+    fits["Driver"] = fits["Driver"].astype(str)
+    fits["Compound"] = fits["Compound"].astype(str)
+    fits["Laps"] = n.astype(np.int64)
+    fits["Slope (s/lap)"] = slope
+    fits["Intercept (s)"] = intercept
+    usable = (n >= min_laps) & (denominator > 0)
+    return fits[usable].reset_index(drop=True)
+
+
+def degradation_rates(laps, time_column=None, min_laps=MIN_STINT_LAPS):
+    """Per-driver, per-compound degradation rate: stint slopes averaged by stint length."""
+    fits = stint_fits(laps, time_column, min_laps)
+    fits["Weighted"] = fits["Slope (s/lap)"] * fits["Laps"]
+    rates = fits.groupby(["Driver", "Compound"]).agg(
+        Weighted=("Weighted", "sum"), Stints=("Laps", "size"), Laps=("Laps", "sum"),
+    ).reset_index()
+    rates["DegradationRate (s/lap)"] = rates["Weighted"] / rates["Laps"]
+    return rates[["Driver", "Compound", "DegradationRate (s/lap)", "Stints", "Laps"]]
+
+
+def driver_degradation(year, gp, identifier="R", store_dir=STORE_DIR):
+    """Degradation rates of one session, cached like the other features."""
+    ensure_stored(year, gp, identifier, store_dir)
+    columns = COLUMNS + ([FUEL_COLUMN] if has_fuel_correction(year, gp, identifier, store_dir) else [])
+    key = input_hash(year, gp, identifier, columns, store_dir=store_dir)
+    return cached(
+        "degradation", key,
+        lambda: degradation_rates(load_laps(year, gp, identifier, columns, store_dir=store_dir)),
+    )
+
+
+def season_degradation(years, identifier="R", store_dir=STORE_DIR):
+    """Degradation rates over every stored session of the given seasons, fitted in one batch."""
+    # one time column for the whole batch: fuel-corrected only if every session has it (python fuel.py backfills it)
+    sessions = list_sessions(years, identifier, store_dir)
+    corrected = bool(sessions) and all(has_fuel_correction(y, e["round"], e["session"], store_dir) for y, e in sessions)
+    columns = COLUMNS + ([FUEL_COLUMN] if corrected else [])
+    return degradation_rates(load_history(years, identifier, columns, store_dir=store_dir))
+
+
+def circuit_degradation(circuit, years, drivers=None, identifier="R", store_dir=STORE_DIR):
+    """
+    {driver: seconds lost per lap of tyre age} at a circuit over several seasons, across compounds.
+
+    Rates are weighted by the laps behind them; drivers without a usable stint there get 0.0.
+    """
+    rates = pd.concat([driver_degradation(year, circuit, identifier, store_dir) for year in years], ignore_index=True)
+    rates["Weighted"] = rates["DegradationRate (s/lap)"] * rates["Laps"]
+    totals = rates.groupby("Driver")[["Weighted", "Laps"]].sum()
+    rate = (totals["Weighted"] / totals["Laps"]).round(4)
+    if drivers is not None:
+        rate = rate.reindex([str(d) for d in drivers]).fillna(0.0)
+    return rate.to_dict()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-driver, per-compound tyre degradation rates")
+    parser.add_argument("years", type=int, nargs="+")
+    parser.add_argument("--session", default="R")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+    rates = season_degradation(args.years, args.session, args.store)
+    print(rates.sort_values(["Compound", "DegradationRate (s/lap)"]).to_string(index=False))
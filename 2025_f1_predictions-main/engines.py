@@ -0,0 +1,104 @@
+"""
+Pluggable model engines for the training step.
+
+The scripts build sklearn's exact GradientBoostingRegressor, which is fine on
+~20 per-driver means but slow on every lap of several seasons. make_model()
+returns either that ("gbr", the default) or HistGradientBoostingRegressor
+("hist"): binned features, multi-threaded fitting, early stopping on large
+training sets and native NaN handling, so the SimpleImputer step is optional
+with it.
+
+The engine comes from the argument or the F1_MODEL_ENGINE environment
+variable; the scripts' GradientBoostingRegressor keyword arguments are
+translated (n_estimators -> max_iter and so on).
+
+Usage:
+    model = make_model(n_estimators=250, learning_rate=0.1, max_depth=3, random_state=42)
+    F1_MODEL_ENGINE=hist python prediction19.py
+    X_train = prepare(X_train, imputer)            # imputes only for engines that need it
+    importances = feature_importances(model, X_test, y_test)
+    add_iterations(model, 20).fit(X_new, y_new)   # 20 more boosting rounds on new data only
+"""
+import os
+
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
+
+DEFAULT_ENGINE = "gbr"
+
+# GradientBoostingRegressor argument -> HistGradientBoostingRegressor argument (None = not supported)
+HIST_ARGUMENTS = {
+    "n_estimators": "max_iter",
+    "learning_rate": "learning_rate",
+    "max_depth": "max_depth",
+    "min_samples_leaf": "min_samples_leaf",
+    "random_state": "random_state",
+    "loss": "loss",
+    "subsample": None,
+    "max_features": "max_features",
+}
+
+# early stopping only kicks in ("auto") once the training set has more than 10k rows
+HIST_DEFAULTS = {"early_stopping": "auto", "validation_fraction": 0.1, "n_iter_no_change": 10}
+
+
+def engine_name(engine=None):
+    engine = engine or os.environ.get("F1_MODEL_ENGINE", DEFAULT_ENGINE)
+    if engine not in ("gbr", "hist"):
+        raise ValueError(f"Unknown model engine {engine!r}, expected 'gbr' or 'hist'")
+    return engine
+
+
+def handles_missing(engine=None):
+    """True if the engine accepts NaN features without an imputer."""
+    return engine_name(engine) == "hist"
+
+
+def make_model(engine=None, **params):
+    """An unfitted regressor of the selected engine, from GradientBoostingRegressor-style arguments."""
+    if engine_name(engine) == "gbr":
+        return GradientBoostingRegressor(**params)
+    hist_params = dict(HIST_DEFAULTS)
+    for name, value in params.items():
+        target = HIST_ARGUMENTS.get(name, name)
+        if target is None:
+            continue  # no histogram equivalent, e.g. subsample
+        hist_params[target] = value
+    return HistGradientBoostingRegressor(**hist_params)
+
+
+def prepare(X, imputer=None, engine=None):
+    """Apply an already fitted imputer unless the engine handles NaN itself."""
+    if imputer is None or handles_missing(engine):
+        return X
+    return imputer.transform(X)
+
+
+def iterations(model):
+    """Boosting iterations a fitted model has done."""
+    if isinstance(model, HistGradientBoostingRegressor):
+        return model.n_iter_
+    return model.n_estimators_
+
+
+def add_iterations(model, n_more):
+    """
+    Set a fitted model up so its next fit() adds `n_more` boosting iterations.
+
+    Both engines support warm_start: the existing trees are kept, and the new
+    ones are fitted to the residuals of the data passed to that fit() call.
+    """
+    name = "max_iter" if isinstance(model, HistGradientBoostingRegressor) else "n_estimators"
+    # from the iterations actually done, which early stopping may have cut short
+    model.set_params(warm_start=True, **{name: iterations(model) + n_more})
+    return model
+
+
+def feature_importances(model, X, y, random_state=0):
+    """Impurity importances where the engine has them, permutation importances (normalised) otherwise."""
+    if hasattr(model, "feature_importances_"):
+        return model.feature_importances_
+    result = permutation_importance(model, X, y, n_repeats=5, random_state=random_state)
+    importances = result.importances_mean.clip(min=0)
+    total = importances.sum()
+    return importances / total if total > 0 else importances
@@ -0,0 +1,95 @@
+"""
+Shared, cached feature pipeline.
+
+Replaces the block every prediction script used to copy: load the session,
+convert LapTime/Sector*Time to seconds, group by driver, add the
+"TotalSectorTime (s)" sum and take the mean "LapTime (s)" target.
+Results are computed once per (season, round, session), persisted under
+feature_cache/ keyed by a content hash of the input columns, and returned
+straight from disk on every later run.
+
+    sector_times_2024 = sector_features(2024, 8, "R")
+    # Driver, Sector1Time (s), Sector2Time (s), Sector3Time (s), TotalSectorTime (s), LapTime (s)
+    sector_times_2024 = sector_features(2024, 8, "R", fuel_corrected=True)
+    # ... plus FuelCorrectedLapTime (s), the mean lap time with the fuel load taken out (see fuel.py)
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from fuel import COLUMN as FUEL_COLUMN, has_fuel_correction, write_fuel_correction
+from lap_store import STORE_DIR, find_session, ingest_session, load_laps, read_columns
+from session_loader import load_session
+
+FEATURE_DIR = "feature_cache"
+# bump when a feature's definition changes so old cached results are not reused
+FEATURE_VERSION = 2
+
+SECTOR_COLUMNS = ["Sector1Time", "Sector2Time", "Sector3Time"]
+
+_memo = {}
+
+
+def ensure_stored(year, gp, identifier, store_dir=STORE_DIR):
+    """Ingest a session into the lap store the first time it is needed."""
+    if find_session(year, gp, identifier, store_dir)[0] is None:
+        ingest_session(load_session(year, gp, identifier), store_dir)
+
+
+def input_hash(year, gp, identifier, columns, table="laps", store_dir=STORE_DIR):
+    """Content hash of the stored columns a feature reads."""
+    arrays, schema = read_columns(year, gp, identifier, columns, table, store_dir)
+    digest = hashlib.sha256()
+    for column in columns:
+        digest.update(column.encode())
+        digest.update(repr(schema["columns"][column]).encode())
+        digest.update(np.ascontiguousarray(arrays[column]))
+    return digest.hexdigest()
+
+
+def cached(name, key, compute, feature_dir=FEATURE_DIR):
+    """Return compute() for this key, reusing the in-process or on-disk result when there is one."""
+    digest = hashlib.sha256(f"{name}:{FEATURE_VERSION}:{key}".encode()).hexdigest()[:20]
+    path = os.path.join(feature_dir, f"{name}_{digest}.pkl")
+    if path in _memo:
+        return _memo[path].copy()
+    if os.path.exists(path):
+        result = pd.read_pickle(path)
+    else:
+        result = compute()
+        os.makedirs(feature_dir, exist_ok=True)
+        result.to_pickle(path + ".tmp")
+        os.replace(path + ".tmp", path)
+    _memo[path] = result
+    return result.copy()
+
+
+def _sector_features(laps, extra=()):
+    laps = laps.dropna()
+    features = laps.groupby("Driver", observed=True).agg(
+        **{f"{column} (s)": (f"{column} (s)", "mean") for column in SECTOR_COLUMNS + ["LapTime"] + list(extra)}
+    ).astype(np.float64).reset_index()
+    features["Driver"] = features["Driver"].astype(str)
+    features["TotalSectorTime (s)"] = features[[f"{column} (s)" for column in SECTOR_COLUMNS]].sum(axis=1)
+    return features[
+        ["Driver"] + [f"{column} (s)" for column in SECTOR_COLUMNS]
+        + ["TotalSectorTime (s)", "LapTime (s)"] + [f"{column} (s)" for column in extra]
+    ]
+
+
+def sector_features(year, gp, identifier="R", store_dir=STORE_DIR, feature_dir=FEATURE_DIR, fuel_corrected=False):
+    """Per-driver mean sector times, their total and the mean lap time (optionally also fuel-corrected) of one session."""
+    extra = [FUEL_COLUMN] if fuel_corrected else []
+    columns = ["Driver", "LapTime"] + SECTOR_COLUMNS + extra
+    ensure_stored(year, gp, identifier, store_dir)
+    if fuel_corrected and not has_fuel_correction(year, gp, identifier, store_dir):
+        _, entry = find_session(year, gp, identifier, store_dir)
+        write_fuel_correction(year, entry["round"], [entry["session"]], store_dir)
+    key = input_hash(year, gp, identifier, columns, store_dir=store_dir)
+    return cached(
+        "sector_features", key,
+        lambda: _sector_features(load_laps(year, gp, identifier, columns, store_dir=store_dir), extra),
+        feature_dir,
+    )
@@ -0,0 +1,199 @@
+"""
+Rolling driver form as exponentially weighted moving averages.
+
+Replaces the hand-tuned recent_form / form_<race> multipliers. After each
+race three signals are folded into an EWMA per driver:
+
+    PaceDelta (%)       median green-flag race lap vs the field median, in percent
+    FinishPosition      race finishing position
+    QualifyingGap (%)   best qualifying lap vs pole, in percent (when qualifying is stored)
+
+State is one small array per signal indexed by registry driver ID, stored in
+lap_store/form_state.npz with a snapshot after every race, so an update only
+touches the drivers of that race and a lookup is an array gather. ingest.py
+updates it after every stored race; rounds must arrive in calendar order,
+anything else triggers a replay from the stored races. Lookups only read the
+state and take the snapshot from before the predicted round, so later races
+never leak into a prediction.
+
+Usage:
+    python form.py                                  # fold in stored races not applied yet
+    recent_form = form_multipliers(qualifying_2025["Driver"], before=(2025, 20))   # {"VER": 0.994, ...}
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from clean_air import NEUTRALISED_STATUS
+from lap_store import STORE_DIR, find_session, list_sessions, load_laps
+from registry import DRIVERS, driver_ids
+
+STATE_NAME = "form_state.npz"
+ALPHA = 0.3
+SIGNALS = ["PaceDelta (%)", "FinishPosition", "QualifyingGap (%)"]
+
+PACE_COLUMNS = ["Driver", "LapNumber", "LapTime", "PitInTime", "PitOutTime", "TrackStatus"]
+
+
+def _round_stamp(year, round_number):
+    return int(year) * 100 + int(round_number)
+
+
+def _pace_delta(year, round_number, store_dir):
+    laps = load_laps(year, round_number, "R", PACE_COLUMNS, store_dir=store_dir)
+    green = (
+        laps["LapTime (s)"].notna()
+        & laps["PitInTime (s)"].isna()
+        & laps["PitOutTime (s)"].isna()
+        & (laps["LapNumber"].fillna(0) > 1)
+        & ~laps["TrackStatus"].astype(str).str.contains(f"[{NEUTRALISED_STATUS}]", regex=True)
+    ).to_numpy()
+    pace = laps[green].groupby("Driver", observed=True)["LapTime (s)"].median()
+    return pd.Series((pace / pace.median() - 1).to_numpy(dtype=np.float64) * 100, index=pace.index.astype(str))
+
+
+def _finish_position(year, round_number, store_dir):
+    results = load_laps(year, round_number, "R", ["Driver", "Position"], "results", store_dir, compact=False)
+    return pd.Series(results["Position"].to_numpy(dtype=np.float64), index=results["Driver"].astype(str))
+
+
+def _qualifying_gap(year, round_number, store_dir):
+    if find_session(year, round_number, "Q", store_dir)[0] is None:
+        return pd.Series(dtype=np.float64)
+    results = load_laps(year, round_number, "Q", ["Driver", "Q1", "Q2", "Q3"], "results", store_dir, compact=False)
+    best = results[["Q1 (s)", "Q2 (s)", "Q3 (s)"]].min(axis=1).to_numpy(dtype=np.float64)
+    return pd.Series((best / np.nanmin(best) - 1) * 100, index=results["Driver"].astype(str))
+
+
+def race_signals(year, round_number, store_dir=STORE_DIR):
+    """(driver IDs, signals x drivers array) for one stored race; NaN where a signal is missing."""
+    columns = [_pace_delta(year, round_number, store_dir), _finish_position(year, round_number, store_dir),
+               _qualifying_gap(year, round_number, store_dir)]
+    frame = pd.concat(columns, axis=1)
+    ids = driver_ids(frame.index)
+    known = ids >= 0  # drivers missing from registry.DRIVERS are not tracked
+    return ids[known], frame.to_numpy(dtype=np.float64)[known].T
+
+
+class FormTracker:
+    """EWMA state per signal and driver, plus the rounds already folded in."""
+
+    def __init__(self, values=None, counts=None, rounds=(), history=None, history_counts=None):
+        shape = (len(SIGNALS), len(DRIVERS))
+        self.values = np.full(shape, np.nan) if values is None else values
+        self.counts = np.zeros(shape, dtype=np.int32) if counts is None else counts
+        self.rounds = list(rounds)
+        # state after each of self.rounds: (rounds x signals x drivers)
+        self.history = np.empty((0,) + shape) if history is None else history
+        self.history_counts = np.zeros((0,) + shape, dtype=np.int32) if history_counts is None else history_counts
+        # drivers added to the registry since the state was saved get empty columns
+        missing = len(DRIVERS) - self.values.shape[1]
+        if missing > 0:
+            self.values = np.pad(self.values, ((0, 0), (0, missing)), constant_values=np.nan)
+            self.counts = np.pad(self.counts, ((0, 0), (0, missing)))
+            self.history = np.pad(self.history, ((0, 0), (0, 0), (0, missing)), constant_values=np.nan)
+            self.history_counts = np.pad(self.history_counts, ((0, 0), (0, 0), (0, missing)))
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        path = os.path.join(store_dir, STATE_NAME)
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            return cls(data["values"], data["counts"], data["rounds"].tolist(), data["history"], data["history_counts"])
+
+    def save(self, store_dir=STORE_DIR):
+        os.makedirs(store_dir, exist_ok=True)
+        path = os.path.join(store_dir, STATE_NAME)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, values=self.values, counts=self.counts, rounds=np.array(self.rounds, dtype=np.int64),
+                     history=self.history, history_counts=self.history_counts)
+        os.replace(path + ".tmp", path)
+
+    def update(self, ids, signals, alpha=ALPHA):
+        """Fold one race in; only the columns of drivers in it are touched."""
+        for row, observed in enumerate(signals):
+            present = np.isfinite(observed)
+            cols = ids[present]
+            previous = self.values[row, cols]
+            first = self.counts[row, cols] == 0
+            self.values[row, cols] = np.where(first, observed[present], alpha * observed[present] + (1 - alpha) * previous)
+            self.counts[row, cols] += 1
+
+    def apply_race(self, year, round_number, store_dir=STORE_DIR):
+        """Fold in a stored race that comes after every race already applied. Returns False if it does not."""
+        stamp = _round_stamp(year, round_number)
+        if self.rounds and stamp <= self.rounds[-1]:
+            return False
+        self.update(*race_signals(year, round_number, store_dir))
+        self.rounds.append(stamp)
+        self.history = np.concatenate([self.history, self.values[None]])
+        self.history_counts = np.concatenate([self.history_counts, self.counts[None]])
+        return True
+
+    def snapshot(self, before=None):
+        """(values, counts) after the last race before (year, round), or the current state if before is None."""
+        if before is None:
+            return self.values, self.counts
+        position = int(np.searchsorted(self.rounds, _round_stamp(*before))) - 1
+        if position < 0:
+            return np.full_like(self.values, np.nan), np.zeros_like(self.counts)
+        return self.history[position], self.history_counts[position]
+
+    def form(self, drivers=None, before=None):
+        """Form of the given drivers (codes or names), or of every tracked driver, optionally before (year, round)."""
+        values, counts = self.snapshot(before)
+        ids = np.flatnonzero(counts.any(axis=0)) if drivers is None else driver_ids(drivers)
+        values = np.where(ids >= 0, values[:, ids], np.nan)
+        frame = pd.DataFrame(values.T, columns=SIGNALS)
+        frame.insert(0, "Driver", [DRIVERS[i][0] for i in ids] if drivers is None else [str(d) for d in drivers])
+        return frame
+
+
+def update_state(store_dir=STORE_DIR, rebuild=False):
+    """Fold every stored race after the last applied one into the state. Returns how many were added."""
+    tracker = FormTracker() if rebuild else FormTracker.load(store_dir)
+    added = 0
+    for year, entry in list_sessions(None, "R", store_dir):
+        if "results" in entry["tables"]:
+            added += tracker.apply_race(year, entry["round"], store_dir)
+    if added or rebuild:
+        tracker.save(store_dir)
+    return added
+
+
+def update_form(year, round_number, codes, store_dir=STORE_DIR):
+    """ingest.py step: fold a new race in, replaying history if it is not the latest round."""
+    if "R" not in codes:
+        return
+    tracker = FormTracker.load(store_dir)
+    if tracker.apply_race(year, round_number, store_dir):
+        tracker.save(store_dir)
+    else:
+        update_state(store_dir, rebuild=True)
+
+
+def form_multipliers(drivers, before=None, store_dir=STORE_DIR):
+    """
+    {driver: 1 + pace delta} (below 1.0 = in form), the drop-in for the hand-tuned form dicts.
+
+    `before` is the (year, round) being predicted: only races before it count.
+    Only reads the state that ingest.py (or this module's CLI) keeps current.
+    """
+    if not os.path.exists(os.path.join(store_dir, STATE_NAME)):
+        raise FileNotFoundError(f"No form state in {store_dir}; "
+                                f"run python ingest.py <year> for the seasons it should cover first")
+    pace = FormTracker.load(store_dir).form(drivers, before)["PaceDelta (%)"].fillna(0.0)
+    return dict(zip([str(d) for d in drivers], (1 + pace / 100).round(3)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update and show the driver form EWMAs")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="replay every stored race from scratch")
+    args = parser.parse_args()
+    added = update_state(args.store, args.rebuild)
+    print(f"{added} race(s) folded into {os.path.join(args.store, STATE_NAME)}")
+    print(FormTracker.load(args.store).form().sort_values("PaceDelta (%)").to_string(index=False))
@@ -0,0 +1,76 @@
+"""
+Fuel-corrected lap times stored alongside the raw laps.
+
+A race lap on a full tank is a few seconds slower than the same lap near the
+end, so the raw mean LapTime mixes car pace with fuel load. Each race and
+sprint lap is adjusted to an empty-tank equivalent:
+
+    FuelCorrectedLapTime = LapTime - TIME_PER_KG * fuel on board at the start of the lap
+
+with the burn per lap estimated per circuit as the start load spread evenly
+over that race's distance in laps. The column is written into the stored laps
+table once, at ingest (see ingest.py); other sessions get the raw lap time so
+the column exists everywhere.
+
+Usage:
+    python fuel.py                     # backfill every stored session that lacks the column
+    python fuel.py 2024 --force        # recompute a season, e.g. after changing the constants
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from lap_store import STORE_DIR, add_column, list_sessions, load_laps, read_columns
+
+COLUMN = "FuelCorrectedLapTime"
+START_FUEL_KG = 100.0
+TIME_PER_KG = 0.03
+# a sprint is about a third of a grand prix distance and starts with fuel for that
+SPRINT_FUEL_SHARE = 1 / 3
+FUELLED_SESSIONS = {"R": 1.0, "S": SPRINT_FUEL_SHARE}
+
+
+def fuel_corrected(lap_times, lap_numbers, start_fuel=START_FUEL_KG):
+    """Empty-tank equivalent lap times (seconds) for one session."""
+    lap_times = np.asarray(lap_times, dtype=np.float64)
+    lap_numbers = np.asarray(lap_numbers, dtype=np.float64)
+    total_laps = np.nanmax(lap_numbers) if len(lap_numbers) else 0
+    if not total_laps > 0:
+        return lap_times
+    fuel_on_board = np.clip(start_fuel * (1 - (lap_numbers - 1) / total_laps), 0, start_fuel)
+    return lap_times - TIME_PER_KG * np.nan_to_num(fuel_on_board)
+
+
+def write_fuel_correction(year, round_number, codes, store_dir=STORE_DIR):
+    """Store the FuelCorrectedLapTime column for the given sessions of a round (an ingest.py step)."""
+    for code in codes:
+        laps = load_laps(year, round_number, code, ["LapNumber", "LapTime"], store_dir=store_dir, compact=False)
+        seconds = laps["LapTime (s)"].to_numpy()
+        if code in FUELLED_SESSIONS:
+            seconds = fuel_corrected(seconds, laps["LapNumber"], START_FUEL_KG * FUELLED_SESSIONS[code])
+        add_column(year, round_number, code, "laps", COLUMN, pd.to_timedelta(seconds, unit="s"), store_dir)
+
+
+def has_fuel_correction(year, gp, identifier, store_dir=STORE_DIR):
+    return COLUMN in read_columns(year, gp, identifier, [], store_dir=store_dir)[1]["columns"]
+
+
+def backfill(years=None, store_dir=STORE_DIR, force=False):
+    """Add the column to every stored session that does not have it yet. Returns how many were written."""
+    written = 0
+    for year, entry in list_sessions(years, None, store_dir):
+        if force or not has_fuel_correction(year, entry["round"], entry["session"], store_dir):
+            write_fuel_correction(year, entry["round"], [entry["session"]], store_dir)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill fuel-corrected lap times in the lap store")
+    parser.add_argument("years", type=int, nargs="*", help="seasons to process (default: every stored season)")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="recompute sessions that already have the column")
+    args = parser.parse_args()
+    written = backfill(args.years or None, args.store, args.force)
+    print(f"{written} session(s) updated in {args.store}")
@@ -0,0 +1,151 @@
+"""
+Season models kept current by warm-started boosting.
+
+A season model is trained on every stored session of one season in the
+training matrix (training_set.py). When new rounds are appended it is not
+retrained from zero: the stored model gets ITERATIONS_PER_UPDATE more boosting
+iterations fitted on the new sessions' rows only (warm_start, see
+engines.add_iterations), so a mid-season update, or a refresh between
+qualifying and the race, costs only the new data.
+
+Warm starts drift away from what a full fit would give, so update() refits
+from scratch when any of these hold:
+
+    no stored model, or the engine, features or base parameters changed
+    the sessions it was trained on were rewritten (e.g. re-ingested)
+    MAX_UPDATES warm starts since the last full fit
+    the model would grow past MAX_ITERATIONS
+    its error on the new rows is over DRIFT_RATIO times its average error on
+    earlier updates' rows (measured before fitting them)
+
+Models are stored in the model registry as "season_<year>_<target>", together
+with the sessions they have seen.
+
+Usage:
+    python incremental.py 2025                      # fold newly stored races into the 2025 model
+    python incremental.py 2025 --sessions Q R       # also refresh after qualifying
+    record, action = update(2025)
+    record["model"].predict(...)
+"""
+import argparse
+import re
+
+import numpy as np
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error
+
+from engines import add_iterations, engine_name, handles_missing, iterations, make_model, prepare
+from lap_store import STORE_DIR
+from model_registry import MODEL_DIR, data_hash, load_latest, model_key, save_model
+from training_set import SESSION_TYPES, TrainingSet, build, design_matrix
+
+SEASON_PARAMS = {"n_estimators": 300, "learning_rate": 0.05, "max_depth": 4, "random_state": 42}
+ITERATIONS_PER_UPDATE = 30
+
+# full refit policy
+MAX_UPDATES = 6
+MAX_ITERATIONS = 1000
+DRIFT_RATIO = 1.5
+
+
+def model_name(year, target="LapTime (s)"):
+    return f"season_{int(year)}_{re.sub(r'[^a-z0-9]+', '_', target.lower()).strip('_')}"
+
+
+def _session_keys(frame):
+    """Session key ("2025/05_R") of every row, as stored in the lap store."""
+    codes = dict(enumerate(SESSION_TYPES))
+    return (frame["Year"].astype(int).astype(str) + "/" + frame["Round"].astype(int).map("{:02d}".format)
+            + "_" + frame["Session"].astype(int).map(codes))
+
+
+def refit_reason(record, engine, features, params, trained_hash):
+    """Why the stored record cannot be warm-started, or None if it can (drift is checked separately)."""
+    if record is None:
+        return "no stored model"
+    if record.get("engine") != engine or record["features"] != features or record.get("base_params") != params:
+        return "engine, features or parameters changed"
+    if record["data_hash"] != trained_hash:
+        return "trained sessions changed"
+    if record["updates"] >= MAX_UPDATES:
+        return f"{MAX_UPDATES} updates since the last full fit"
+    if iterations(record["model"]) + ITERATIONS_PER_UPDATE > MAX_ITERATIONS:
+        return f"more than {MAX_ITERATIONS} iterations"
+    return None
+
+
+def drift_reason(record, new_error):
+    """Refit reason if the error on new rows is well above the error on earlier updates' rows."""
+    errors = record["update_errors"]
+    if errors and new_error > DRIFT_RATIO * np.mean(errors):
+        return f"error on new rows {new_error:.3f}s vs {np.mean(errors):.3f}s on earlier updates"
+    return None
+
+
+def update(year, target="LapTime (s)", sessions=("R",), engine=None, params=None, refit=False,
+           store_dir=STORE_DIR, model_dir=MODEL_DIR):
+    """
+    Bring the season model up to date with the stored sessions.
+
+    Returns (record, action), action being "unchanged", "updated" or
+    "refit: <reason>".
+    """
+    engine = engine_name(engine)
+    params = {**SEASON_PARAMS, **(params or {})}
+    name = model_name(year, target)
+    build([year], store_dir)
+    frame = TrainingSet.load(store_dir).select([year], None, sessions)
+    frame = frame[frame[target].notna()].reset_index(drop=True)
+    if frame.empty:
+        raise FileNotFoundError(f"No stored {'/'.join(sessions)} sessions with {target} for {year}")
+    X, y, _ = design_matrix(frame, target)
+    keys = _session_keys(frame)
+
+    try:
+        record = load_latest(name, model_dir)
+    except FileNotFoundError:
+        record = None
+    new = ~keys.isin(record["sessions"] if record else []).to_numpy()
+    if record is not None and not new.any() and not refit:
+        return record, "unchanged"
+
+    trained_hash = data_hash(X[~new], y[~new])
+    reason = "requested" if refit else refit_reason(record, engine, list(X.columns), params, trained_hash)
+    if reason is None:
+        # the record matches this data, so it can score the new rows: error on rounds it has not seen yet
+        new_error = mean_absolute_error(y[new], record["model"].predict(prepare(X[new], record["imputer"], engine)))
+        reason = drift_reason(record, new_error)
+
+    if reason is None:
+        model, imputer = record["model"], record["imputer"]
+        add_iterations(model, ITERATIONS_PER_UPDATE).fit(prepare(X[new], imputer, engine), y[new])
+        history = {"updates": record["updates"] + 1, "update_errors": record["update_errors"] + [new_error]}
+        action = "updated"
+    else:
+        imputer = None if handles_missing(engine) else SimpleImputer(strategy="median").fit(X)
+        model = make_model(engine, **params)
+        model.fit(prepare(X, imputer, engine), y)
+        history = {"updates": 0, "update_errors": []}
+        action = f"refit: {reason}"
+
+    features = list(X.columns)
+    training_hash = data_hash(X, y)
+    record = save_model(name, model_key(model, features, training_hash), model, imputer, features, training_hash,
+                        model_dir, engine=engine, base_params=params, sessions=sorted(set(keys)), **history)
+    return record, action
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-start the season model with newly stored sessions")
+    parser.add_argument("year", type=int)
+    parser.add_argument("--target", default="LapTime (s)")
+    parser.add_argument("--sessions", nargs="+", default=["R"], help="session types to train on")
+    parser.add_argument("--engine", choices=["gbr", "hist"])
+    parser.add_argument("--refit", action="store_true", help="retrain from scratch")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    record, action = update(args.year, args.target, args.sessions, args.engine, refit=args.refit,
+                            store_dir=args.store)
+    print(f"{model_name(args.year, args.target)}: {action}, {iterations(record['model'])} iterations over "
+          f"{len(record['sessions'])} session(s)")
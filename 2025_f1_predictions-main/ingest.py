@@ -0,0 +1,169 @@
+"""
+Incremental round ingestion.
+
+When a race weekend finishes, only that round's sessions are loaded and
+appended to the lap store (laps and results), and DERIVED_STEPS bring the
+features derived from them up to date. A round whose stored columns hash the
+same as last time is skipped. Each step recomputes only what depends on the
+round it is given:
+
+    write_fuel_correction, write_intervals,     columns/tables of the round's own
+    write_summary, write_wet_pace               sessions; nothing else reads them
+    update_position_index                       folds the race into the per-circuit
+                                                sums; a race already counted means
+                                                a rebuild from the stored results
+    update_standings                            cumulative points: every later round
+                                                of the season depends on this one,
+                                                recomputed from the season's results
+    update_form                                 EWMAs are order-dependent: the latest
+                                                race is folded in, an earlier one
+                                                replays the stored races
+    append_round                                rewrites the round's rows of the
+                                                training matrix, other rows are kept
+
+Nothing from earlier rounds is reloaded, so a post-race refresh costs the same
+in round 24 as in round 1. With F1_OFFLINE=1 sessions that are not cached are
+skipped (and reported).
+
+Usage:
+    python ingest.py 2025 17                 # ingest round 17 (Q, Sprint, Race)
+    python ingest.py 2025 17 18 --sessions R
+    python ingest.py 2024                    # every finished round of a season (first-time setup)
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from cache_manifest import session_code
+from form import update_form
+from fuel import write_fuel_correction
+from lap_store import LAP_COLUMNS, RESULT_COLUMNS, STORE_DIR, add_table, ingest_session, load_laps, session_key
+from position_changes import update_position_index
+from prefetch import plan_jobs
+from standings import update_standings
+from traffic import write_intervals
+from training_set import append_round
+from wet_performance import write_wet_pace
+from session_loader import load_session, session_available
+
+STATE_NAME = "ingest_state.json"
+DEFAULT_SESSIONS = ("Q", "S", "R")
+
+SUMMARY_COLUMNS = ["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]
+
+
+def _state_path(store_dir):
+    return os.path.join(store_dir, STATE_NAME)
+
+
+def read_state(store_dir=STORE_DIR):
+    path = _state_path(store_dir)
+    if not os.path.exists(path):
+        return {"rounds": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_state(state, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    path = _state_path(store_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def round_key(year, round_number):
+    return f"{int(year)}/{int(round_number):02d}"
+
+
+# columns written by ingest_session; derived columns added later (FuelCorrectedLapTime, ...) are not hashed
+HASHED_COLUMNS = {"laps": set(LAP_COLUMNS), "results": set(RESULT_COLUMNS.values())}
+
+
+def _content_hash(year, round_number, codes, store_dir):
+    """Hash the stored lap and result columns of a round."""
+    digest = hashlib.sha256()
+    for code in sorted(codes):
+        session_dir = os.path.join(store_dir, session_key(year, round_number, code))
+        for table, columns in HASHED_COLUMNS.items():
+            for column in sorted(columns):
+                path = os.path.join(session_dir, table, f"{column}.npy")
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def write_summary(year, round_number, codes, store_dir=STORE_DIR):
+    """Per-driver mean lap and sector times of each session, stored as the "summary" table."""
+    for code in codes:
+        laps = load_laps(year, round_number, code, SUMMARY_COLUMNS, store_dir=store_dir).dropna()
+        summary = laps.groupby("Driver", observed=True).agg(
+            **{column: (f"{column} (s)", "mean") for column in SUMMARY_COLUMNS[1:]},
+            LapCount=("LapTime (s)", "size"),
+        ).reset_index()
+        summary["TotalSectorTime"] = summary[["Sector1Time", "Sector2Time", "Sector3Time"]].sum(axis=1)
+        # store as timedeltas so load_laps() hands them back as "<column> (s)" like the lap table
+        for column in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time", "TotalSectorTime"]:
+            summary[column] = pd.to_timedelta(summary[column], unit="s")
+        summary["Driver"] = summary["Driver"].astype(str)
+        add_table(year, round_number, code, "summary", summary, store_dir)
+
+
+# steps run after a round's sessions are stored: step(year, round_number, codes, store_dir)
+DERIVED_STEPS = [
+    write_fuel_correction, write_intervals, write_summary, write_wet_pace, update_position_index, update_standings,
+    update_form, append_round,  # last: its rows use the columns the steps above add
+]
+
+
+def ingest_round(year, round_number, sessions=DEFAULT_SESSIONS, store_dir=STORE_DIR, force=False):
+    """
+    Store one round's sessions and refresh what depends on them.
+
+    Sessions the event does not have (e.g. a sprint at a regular weekend) are
+    skipped, as are sessions that are not cached in offline mode. Returns True
+    if anything changed.
+    """
+    key = round_key(year, round_number)
+    codes = []
+    for identifier in sessions:
+        if not session_available(year, round_number, identifier):
+            print(f"{key} {identifier}: not cached and offline mode is on, skipped")
+            continue
+        try:
+            session = load_session(year, round_number, identifier)
+        except ValueError:
+            continue  # session does not exist at this event
+        ingest_session(session, store_dir)
+        codes.append(session_code(identifier))
+
+    state = read_state(store_dir)
+    content_hash = _content_hash(year, round_number, codes, store_dir)
+    if not force and state["rounds"].get(key, {}).get("hash") == content_hash:
+        print(f"{key} unchanged, nothing to do")
+        return False
+
+    for step in DERIVED_STEPS:
+        step(year, round_number, codes, store_dir)
+    state["rounds"][key] = {"hash": content_hash, "sessions": codes}
+    _write_state(state, store_dir)
+    print(f"Ingested {key}: {', '.join(codes)}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append finished rounds to the lap store")
+    parser.add_argument("year", type=int)
+    parser.add_argument("rounds", type=int, nargs="*", help="default: every finished round of the season")
+    parser.add_argument("--sessions", nargs="+", default=list(DEFAULT_SESSIONS))
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="rerun derived steps even if the data is unchanged")
+    args = parser.parse_args()
+
+    rounds = args.rounds or [round_number for _, round_number, _ in plan_jobs(args.year, args.year, ["R"])]
+    for round_number in rounds:
+        ingest_round(args.year, round_number, args.sessions, args.store, args.force)
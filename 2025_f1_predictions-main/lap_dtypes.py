@@ -0,0 +1,63 @@
+"""
+Compact dtypes for lap frames.
+
+session.laps keeps times as timedelta64 and drivers as Python strings, and the
+scripts then add float64 "(s)" copies column by column. normalize_laps()
+converts a whole lap frame in one pass instead:
+
+    Driver, Team, Compound, TrackStatus   -> category
+    LapTime, Sector1Time, ... (timedelta) -> float32 seconds "<col> (s)" or int32 milliseconds "<col> (ms)"
+    LapNumber, Stint, TyreLife, Position  -> nullable Int16 / Int8
+
+and drops the timedelta originals, which cuts a lap frame to roughly a quarter
+of its size and makes groupby("Driver", observed=True) much cheaper.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ["Driver", "Team", "Compound", "TrackStatus"]
+SMALL_INT_COLUMNS = {"LapNumber": "Int16", "Stint": "Int8", "TyreLife": "Int16", "Position": "Int8"}
+
+# marker for missing int32 millisecond times
+MISSING_MS32 = np.iinfo(np.int32).min
+_NAT = np.iinfo(np.int64).min
+
+
+def normalize_laps(laps, time_unit="s"):
+    """Return a compact copy of a lap frame; time_unit is "s" (float32) or "ms" (int32)."""
+    if time_unit not in ("s", "ms"):
+        raise ValueError(f"time_unit must be 's' or 'ms', not {time_unit!r}")
+    data = {}
+
+    time_columns = [c for c in laps.columns if pd.api.types.is_timedelta64_dtype(laps[c])]
+    if time_columns:
+        # one 2-D block for all time columns instead of a .dt.total_seconds() per column
+        ns = laps[time_columns].to_numpy(dtype="timedelta64[ns]").view(np.int64)
+        missing = ns == _NAT
+        if time_unit == "s":
+            values = (ns / 1e9).astype(np.float32)
+            values[missing] = np.nan
+        else:
+            values = (ns // 1_000_000).astype(np.int32)
+            values[missing] = MISSING_MS32
+        for i, column in enumerate(time_columns):
+            data[f"{column} ({time_unit})"] = values[:, i]
+
+    for column in laps.columns:
+        if column in time_columns:
+            continue
+        series = laps[column]
+        if column in CATEGORY_COLUMNS:
+            data[column] = series.astype("category")
+        elif column in SMALL_INT_COLUMNS:
+            data[column] = series.astype("float32").round().astype(SMALL_INT_COLUMNS[column])
+        elif column.endswith(" (s)") and pd.api.types.is_float_dtype(series):
+            data[column] = series.astype(np.float32)
+        else:
+            data[column] = series
+    return pd.DataFrame(data, index=laps.index)
+
+
+def frame_nbytes(frame):
+    """Deep memory use of a frame in bytes, for comparing layouts."""
+    return int(frame.memory_usage(deep=True).sum())
@@ -0,0 +1,351 @@
+"""
+Columnar lap store built from the FastF1 pickles in f1_cache.
+
+Each cached session is converted once into one .npy file per column
+(times as int64 milliseconds, drivers/teams/compounds as categorical codes)
+so the prediction scripts can memory-map just the columns they need instead
+of unpickling the whole session through session.load().
+
+Layout:
+    lap_store/<year>/index.json                  season-level index
+    lap_store/<year>/<round>_<code>/<table>/     one directory per table (laps, results, ...)
+        schema.json                              row count, column kinds, categories
+        <column>.npy                             column data
+
+Usage:
+    python lap_store.py                          # ingest everything in f1_cache
+    laps = load_laps(2024, 19, "R", ["Driver", "LapTime"])
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from fastf1.exceptions import DataNotLoadedError
+
+from cache_manifest import session_code
+from lap_dtypes import normalize_laps
+from session_loader import load_session
+
+CACHE_DIR = "f1_cache"
+STORE_DIR = "lap_store"
+
+# marker for missing lap/sector times (same bit pattern as NaT)
+MISSING_MS = np.iinfo(np.int64).min
+
+# lap columns kept from session.laps
+LAP_COLUMNS = [
+    "Driver", "Team", "LapNumber", "Stint", "LapTime",
+    "Sector1Time", "Sector2Time", "Sector3Time", "Time", "LapStartTime",
+    "PitInTime", "PitOutTime", "Compound", "TyreLife", "TrackStatus",
+    "Position", "IsAccurate",
+]
+
+# session.results columns kept, renamed to match the lap table
+RESULT_COLUMNS = {
+    "Abbreviation": "Driver", "DriverNumber": "DriverNumber", "TeamName": "Team",
+    "GridPosition": "GridPosition", "Position": "Position", "ClassifiedPosition": "ClassifiedPosition",
+    "Status": "Status", "Points": "Points", "Time": "Time", "Q1": "Q1", "Q2": "Q2", "Q3": "Q3",
+}
+
+# session.weather_data columns kept when the session was loaded with weather
+WEATHER_COLUMNS = ["Time", "AirTemp", "TrackTemp", "Humidity", "Rainfall", "WindSpeed"]
+
+def session_key(year, round_number, identifier):
+    return f"{int(year)}/{int(round_number):02d}_{session_code(identifier)}"
+
+
+# ---------------------------------------------------------------------------
+# writing
+# ---------------------------------------------------------------------------
+
+def _column_kind(series):
+    if pd.api.types.is_timedelta64_dtype(series):
+        return "time"
+    if pd.api.types.is_bool_dtype(series):
+        return "flag"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    return "category"
+
+
+def _encode_column(series):
+    """Encode one column into (array, schema entry)."""
+    kind = _column_kind(series)
+    if kind == "time":
+        ns = series.to_numpy(dtype="timedelta64[ns]").view(np.int64)
+        millis = np.where(ns == MISSING_MS, MISSING_MS, ns // 1_000_000)
+        return millis.astype(np.int64), {"kind": kind}
+    if kind == "flag":
+        return series.to_numpy(dtype=bool), {"kind": kind}
+    if kind == "number":
+        return series.to_numpy(dtype=np.float32, na_value=np.nan), {"kind": kind}
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    return codes.astype(np.int16), {"kind": kind, "categories": [str(u) for u in uniques]}
+
+
+def write_table(session_dir, name, frame):
+    """
+    Write a DataFrame as a columnar table inside a session directory.
+
+    Columns added to the old table with add_column() (fuel-corrected times,
+    intervals) are carried over when the row count is unchanged, so
+    re-ingesting a session does not drop them.
+    """
+    table_dir = os.path.join(session_dir, name)
+    tmp_dir = table_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    schema = {"rows": int(len(frame)), "columns": {}}
+    for column in frame.columns:
+        values, entry = _encode_column(frame[column])
+        np.save(os.path.join(tmp_dir, f"{column}.npy"), values)
+        schema["columns"][column] = entry
+
+    old_schema_path = os.path.join(table_dir, "schema.json")
+    if os.path.exists(old_schema_path):
+        with open(old_schema_path) as f:
+            old_schema = json.load(f)
+        if old_schema["rows"] == schema["rows"]:
+            for column, entry in old_schema["columns"].items():
+                if column not in schema["columns"]:
+                    os.replace(os.path.join(table_dir, f"{column}.npy"), os.path.join(tmp_dir, f"{column}.npy"))
+                    schema["columns"][column] = entry
+    with open(os.path.join(tmp_dir, "schema.json"), "w") as f:
+        json.dump(schema, f)
+
+    shutil.rmtree(table_dir, ignore_errors=True)
+    os.replace(tmp_dir, table_dir)
+    return schema
+
+
+def _read_index(year, store_dir=STORE_DIR):
+    path = os.path.join(store_dir, str(int(year)), "index.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_index(year, index, store_dir=STORE_DIR):
+    season_dir = os.path.join(store_dir, str(int(year)))
+    os.makedirs(season_dir, exist_ok=True)
+    path = os.path.join(season_dir, "index.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def add_table(year, round_number, identifier, name, frame, store_dir=STORE_DIR):
+    """Write (or replace) one table of an indexed session and record its row count."""
+    key = session_key(year, round_number, identifier)
+    schema = write_table(os.path.join(store_dir, key), name, frame)
+    index = _read_index(year, store_dir)
+    sub_key = key.split("/", 1)[1]
+    index[sub_key]["tables"][name] = schema["rows"]
+    _write_index(year, index, store_dir)
+    return schema
+
+
+def add_column(year, round_number, identifier, table, name, series, store_dir=STORE_DIR):
+    """Write (or replace) one column of a stored table without rewriting the others."""
+    key = session_key(year, round_number, identifier)
+    table_dir = os.path.join(store_dir, key, table)
+    schema_path = os.path.join(table_dir, "schema.json")
+    with open(schema_path) as f:
+        schema = json.load(f)
+    if len(series) != schema["rows"]:
+        raise ValueError(f"{name} has {len(series)} rows, {key}/{table} has {schema['rows']}")
+    values, entry = _encode_column(pd.Series(series))
+    np.save(os.path.join(table_dir, f"{name}.npy.tmp.npy"), values)
+    os.replace(os.path.join(table_dir, f"{name}.npy.tmp.npy"), os.path.join(table_dir, f"{name}.npy"))
+    schema["columns"][name] = entry
+    with open(schema_path + ".tmp", "w") as f:
+        json.dump(schema, f)
+    os.replace(schema_path + ".tmp", schema_path)
+    return schema
+
+
+def ingest_session(session, store_dir=STORE_DIR):
+    """Write the laps, results and (if loaded) weather of a FastF1 session into the store and index it."""
+    year = int(session.event["EventDate"].year)
+    round_number = int(session.event["RoundNumber"])
+    code = session_code(session.name)
+    key = session_key(year, round_number, code)
+
+    session_dir = os.path.join(store_dir, key)
+    os.makedirs(session_dir, exist_ok=True)
+    laps = session.laps[[c for c in LAP_COLUMNS if c in session.laps.columns]]
+    tables = {"laps": write_table(session_dir, "laps", pd.DataFrame(laps))["rows"]}
+    results = pd.DataFrame(session.results)
+    if len(results):
+        results = results[[c for c in RESULT_COLUMNS if c in results.columns]].rename(columns=RESULT_COLUMNS)
+        tables["results"] = write_table(session_dir, "results", results)["rows"]
+    try:
+        weather = pd.DataFrame(session.weather_data)
+    except DataNotLoadedError:
+        weather = pd.DataFrame()  # loaded without the weather payload
+    if len(weather):
+        weather = weather[[c for c in WEATHER_COLUMNS if c in weather.columns]].copy()
+        weather["Rainfall"] = weather["Rainfall"].astype(bool)
+        tables["weather"] = write_table(session_dir, "weather", weather)["rows"]
+
+    index = _read_index(year, store_dir)
+    entry = index.get(key.split("/", 1)[1], {})
+    entry.update({
+        "round": round_number,
+        "session": code,
+        "session_name": session.name,
+        "event": session.event["EventName"],
+        "location": session.event["Location"],
+        "country": session.event["Country"],
+        "date": str(session.date),
+        "tables": {**entry.get("tables", {}), **tables},
+    })
+    index[key.split("/", 1)[1]] = entry
+    _write_index(year, index, store_dir)
+    return entry
+
+
+def cached_sessions(cache_dir=CACHE_DIR):
+    """Yield (year, event name, session name) for every session directory in the FastF1 cache."""
+    if not os.path.isdir(cache_dir):
+        return
+    for year in sorted(os.listdir(cache_dir)):
+        if not year.isdigit():
+            continue
+        year_dir = os.path.join(cache_dir, year)
+        for event_dir in sorted(os.listdir(year_dir)):
+            event_path = os.path.join(year_dir, event_dir)
+            if not os.path.isdir(event_path):
+                continue
+            # directories look like 2024-10-20_United_States_Grand_Prix/2024-10-20_Race
+            event_name = event_dir.split("_", 1)[1].replace("_", " ")
+            for session_dir in sorted(os.listdir(event_path)):
+                if os.path.isdir(os.path.join(event_path, session_dir)):
+                    yield int(year), event_name, session_dir.split("_", 1)[1].replace("_", " ")
+
+
+def _is_indexed(year, event_name, session_name, store_dir=STORE_DIR):
+    code = session_code(session_name)
+    return any(entry["event"] == event_name and entry["session"] == code
+               for entry in _read_index(year, store_dir).values())
+
+
+def ingest_cache(cache_dir=CACHE_DIR, store_dir=STORE_DIR, force=False):
+    """Convert every cached session that is not in the store yet. Returns the ingested entries."""
+    ingested = []
+    for year, event_name, session_name in cached_sessions(cache_dir):
+        if not force and _is_indexed(year, event_name, session_name, store_dir):
+            continue
+        session = load_session(year, event_name, session_name, "laps", cache_dir)
+        entry = ingest_session(session, store_dir)
+        print(f"Ingested {year} {event_name} {session_name}: {entry['tables']['laps']} laps")
+        ingested.append(entry)
+    return ingested
+
+
+# ---------------------------------------------------------------------------
+# reading
+# ---------------------------------------------------------------------------
+
+def find_session(year, gp, identifier, store_dir=STORE_DIR):
+    """Return (key, index entry) for a round number or event name, or (None, None)."""
+    code = session_code(identifier)
+    index = _read_index(year, store_dir)
+    for sub_key, entry in sorted(index.items()):
+        if entry["session"] != code:
+            continue
+        if isinstance(gp, (int, np.integer)):
+            if entry["round"] == int(gp):
+                return f"{int(year)}/{sub_key}", entry
+        else:
+            name = str(gp).lower()
+            if name in (entry["event"].lower(), entry["location"].lower(), entry["country"].lower()):
+                return f"{int(year)}/{sub_key}", entry
+    return None, None
+
+
+def list_sessions(years=None, identifier=None, store_dir=STORE_DIR):
+    """Return (year, index entry) for every stored session, in calendar order."""
+    if years is None:
+        years = sorted(int(y) for y in os.listdir(store_dir) if y.isdigit()) if os.path.isdir(store_dir) else []
+    code = session_code(identifier) if identifier is not None else None
+    sessions = []
+    for year in years:
+        for entry in _read_index(year, store_dir).values():
+            if code is None or entry["session"] == code:
+                sessions.append((int(year), entry))
+    return sorted(sessions, key=lambda item: (item[0], item[1]["round"], item[1]["date"]))
+
+
+def read_columns(year, gp, identifier, columns=None, table="laps", store_dir=STORE_DIR):
+    """Memory-map the raw column arrays of a stored table. Returns (arrays, schema)."""
+    key, entry = find_session(year, gp, identifier, store_dir)
+    if key is None:
+        raise FileNotFoundError(f"{year} {gp} {identifier} is not in {store_dir}; run lap_store.py first")
+    table_dir = os.path.join(store_dir, key, table)
+    with open(os.path.join(table_dir, "schema.json")) as f:
+        schema = json.load(f)
+    if columns is None:
+        columns = list(schema["columns"])
+    arrays = {c: np.load(os.path.join(table_dir, f"{c}.npy"), mmap_mode="r") for c in columns}
+    return arrays, schema
+
+
+def decode_column(values, entry):
+    """Turn a stored column back into pandas-friendly values."""
+    if entry["kind"] == "time":
+        seconds = values / 1000.0
+        seconds[values == MISSING_MS] = np.nan
+        return seconds
+    if entry["kind"] == "category":
+        return pd.Categorical.from_codes(np.asarray(values), categories=entry["categories"])
+    return np.asarray(values)
+
+
+def load_laps(year, gp, identifier, columns=None, table="laps", store_dir=STORE_DIR, compact=True):
+    """
+    Load selected columns of a stored session as a DataFrame.
+
+    Time columns come back in seconds and are renamed "<column> (s)" to match
+    what the prediction scripts compute from session.laps. With compact=True
+    they are float32 and lap/stint numbers are small ints (see lap_dtypes.py).
+    """
+    arrays, schema = read_columns(year, gp, identifier, columns, table, store_dir)
+    data = {}
+    for column, values in arrays.items():
+        entry = schema["columns"][column]
+        name = f"{column} (s)" if entry["kind"] == "time" else column
+        data[name] = decode_column(values, entry)
+    frame = pd.DataFrame(data)
+    return normalize_laps(frame) if compact else frame
+
+
+def load_history(years, identifier="R", columns=None, table="laps", store_dir=STORE_DIR):
+    """Concatenate one table of every stored session of the given seasons, tagged by Year and Round."""
+    frames = []
+    for year, entry in list_sessions(years, identifier, store_dir):
+        if table not in entry["tables"]:
+            continue
+        laps = load_laps(year, entry["round"], entry["session"], columns, table, store_dir, compact=False)
+        laps.insert(0, "Year", np.full(len(laps), year, dtype=np.int16))
+        laps.insert(1, "Round", np.full(len(laps), entry["round"], dtype=np.int8))
+        frames.append(laps)
+    if not frames:
+        raise FileNotFoundError(f"No stored sessions for {years} in {store_dir}")
+    # categories differ per session, so concatenate first and normalize once
+    return normalize_laps(pd.concat(frames, ignore_index=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the columnar lap store from f1_cache")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="re-ingest sessions that are already stored")
+    args = parser.parse_args()
+    ingested = ingest_cache(args.cache, args.store, args.force)
+    print(f"{len(ingested)} session(s) ingested into {args.store}")
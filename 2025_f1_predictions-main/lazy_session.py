@@ -0,0 +1,130 @@
+"""
+Lazy FastF1 session proxy.
+
+LazySession looks like a fastf1 session, but nothing is loaded until an
+attribute is read: .laps, .weather_data, .results, .car_data and .pos_data each
+trigger only the load they need, the first time they are touched. Lap and
+weather columns are decoded one at a time and memoized, from the lap store
+(lap_store.load_laps) when the session has been ingested and from FastF1
+otherwise, so a script that only reads Driver, LapTime and the sector times
+never decodes the rest of the session.
+
+Usage:
+    session_2024 = LazySession(2024, 8, "R")
+    laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]]
+"""
+import fastf1
+import pandas as pd
+
+from lap_store import STORE_DIR, find_session, load_laps
+from session_loader import CACHE_DIR, enable_cache
+
+# lazy table -> (lap store table, FastF1 payload that has it)
+TABLES = {"laps": ("laps", "laps"), "weather_data": ("weather", "weather")}
+
+
+class LazyTable:
+    """Column-by-column view of a session table (laps or weather) with per-column memoization."""
+
+    def __init__(self, lazy_session, name):
+        self._session = lazy_session
+        self._name = name
+        self._columns = {}
+        self._fastf1_table = None
+
+    def _is_stored(self):
+        table = TABLES[self._name][0]
+        return table in self._session._stored_tables()
+
+    def _decode(self, column):
+        if column in self._columns:
+            return self._columns[column]
+        s = self._session
+        if self._is_stored():
+            frame = load_laps(s.year, s.gp, s.identifier, [column], TABLES[self._name][0], s.store_dir, compact=False)
+            values = frame.iloc[:, 0]
+            # lap store times are in seconds; hand back timedeltas like the FastF1 session does
+            if frame.columns[0] != column:
+                values = pd.to_timedelta(values, unit="s")
+            values = values.to_numpy()
+        else:
+            if self._fastf1_table is None:
+                self._fastf1_table = getattr(s._load(**{TABLES[self._name][1]: True}), self._name)
+            values = self._fastf1_table[column].to_numpy()
+        self._columns[column] = values
+        return values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self._decode(key), name=key)
+        return pd.DataFrame({column: self._decode(column) for column in key})
+
+    def __len__(self):
+        first = "Driver" if self._name == "laps" else "Time"
+        return len(next(iter(self._columns.values()))) if self._columns else len(self._decode(first))
+
+
+class LazySession:
+    """Stand-in for fastf1.get_session(...) that loads each payload on first access."""
+
+    def __init__(self, year, gp, identifier, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+        self.year = year
+        self.gp = gp
+        self.identifier = identifier
+        self.cache_dir = cache_dir
+        self.store_dir = store_dir
+        self._session = None
+        self._loaded = set()
+        self._tables = {}
+        self._stored = None
+
+    def _stored_tables(self):
+        """Tables of this session in the lap store ({} if it has not been ingested)."""
+        if self._stored is None:
+            entry = find_session(self.year, self.gp, self.identifier, self.store_dir)[1]
+            self._stored = entry["tables"] if entry else {}
+        return self._stored
+
+    def _load(self, laps=False, telemetry=False, weather=False):
+        """Load the requested payloads that are not loaded yet and return the FastF1 session."""
+        wanted = {name for name, flag in (("laps", laps), ("telemetry", telemetry), ("weather", weather)) if flag}
+        missing = wanted - self._loaded
+        if self._session is None:
+            enable_cache(self.cache_dir)
+            self._session = fastf1.get_session(self.year, self.gp, self.identifier)
+        if missing or not self._loaded:
+            self._session.load(
+                laps="laps" in missing, telemetry="telemetry" in missing,
+                weather="weather" in missing, messages=False,
+            )
+            self._loaded |= missing | {"info"}
+        return self._session
+
+    def _table(self, name):
+        if name not in self._tables:
+            self._tables[name] = LazyTable(self, name)
+        return self._tables[name]
+
+    @property
+    def laps(self):
+        return self._table("laps")
+
+    @property
+    def weather_data(self):
+        return self._table("weather_data")
+
+    @property
+    def results(self):
+        return self._load().results
+
+    @property
+    def car_data(self):
+        return self._load(laps=True, telemetry=True).car_data
+
+    @property
+    def pos_data(self):
+        return self._load(laps=True, telemetry=True).pos_data
+
+    @property
+    def event(self):
+        return self._load().event
@@ -0,0 +1,138 @@
+"""
+Persistent registry of fitted models.
+
+A trained regressor is stored together with its fitted imputer, feature list,
+hyperparameters and a hash of the training data. fit_cached() looks that
+combination up first and only calls fit() when the data or the parameters
+changed, so re-running a prediction after a grid penalty (which only changes
+the rows being predicted) costs inference only.
+
+Layout:
+    model_registry/<name>/<key>.joblib      {"model", "imputer", "features", "params", "data_hash", "trained_at"}
+    model_registry/<name>/latest.json       key of the most recently stored model
+
+Usage:
+    model, imputer_X = fit_cached("azerbaijan_2025", GradientBoostingRegressor(n_estimators=250), X_train, y_train, imputer_X)
+    record = load_latest("azerbaijan_2025")         # inference-only runs
+    python model_registry.py                        # list stored models
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = "model_registry"
+# stored models kept per name; older ones are removed when a new one is saved
+KEEP_VERSIONS = 5
+
+
+def data_hash(X, y):
+    """Content hash of a training set (values, column names and target)."""
+    digest = hashlib.sha256()
+    if isinstance(X, pd.DataFrame):
+        digest.update(repr(list(X.columns)).encode())
+    digest.update(np.ascontiguousarray(np.asarray(X, dtype=np.float64)))
+    digest.update(np.ascontiguousarray(np.asarray(y, dtype=np.float64)))
+    return digest.hexdigest()
+
+
+def _params(model):
+    return {key: repr(value) for key, value in sorted(model.get_params().items())}
+
+
+def model_key(model, features, training_hash):
+    """Registry key for an estimator configuration trained on a given data set."""
+    spec = {"class": type(model).__name__, "params": _params(model), "features": features, "data": training_hash}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def _prune(name_dir):
+    paths = sorted((os.path.join(name_dir, f) for f in os.listdir(name_dir) if f.endswith(".joblib")),
+                   key=os.path.getmtime)
+    for path in paths[:-KEEP_VERSIONS]:
+        os.remove(path)
+
+
+def save_model(name, key, model, imputer, features, training_hash, model_dir=MODEL_DIR, **extra):
+    """Store a fitted model; `extra` fields (e.g. incremental.py's training history) go into the record."""
+    name_dir = os.path.join(model_dir, name)
+    os.makedirs(name_dir, exist_ok=True)
+    record = {
+        "model": model,
+        "imputer": imputer,
+        "features": features,
+        "params": model.get_params(),
+        "data_hash": training_hash,
+        "trained_at": time.time(),
+        **extra,
+    }
+    path = os.path.join(name_dir, f"{key}.joblib")
+    joblib.dump(record, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    with open(os.path.join(name_dir, "latest.json.tmp"), "w") as f:
+        json.dump({"key": key}, f)
+    os.replace(os.path.join(name_dir, "latest.json.tmp"), os.path.join(name_dir, "latest.json"))
+    _prune(name_dir)
+    return record
+
+
+def load_model(name, key, model_dir=MODEL_DIR):
+    """Stored record for a key, or None."""
+    path = os.path.join(model_dir, name, f"{key}.joblib")
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def load_latest(name, model_dir=MODEL_DIR):
+    """Most recently stored record of a model name."""
+    latest = os.path.join(model_dir, name, "latest.json")
+    if not os.path.exists(latest):
+        raise FileNotFoundError(f"No stored model named {name!r} in {model_dir}")
+    with open(latest) as f:
+        return load_model(name, json.load(f)["key"], model_dir)
+
+
+def _imputer_hash(imputer):
+    """Hash of a fitted imputer's statistics, so a model is only reused with the imputer it was trained with."""
+    if imputer is None or not hasattr(imputer, "statistics_"):
+        return None
+    return hashlib.sha256(np.ascontiguousarray(np.asarray(imputer.statistics_, dtype=np.float64))).hexdigest()
+
+
+def fit_cached(name, model, X, y, imputer=None, model_dir=MODEL_DIR):
+    """
+    Return (model fitted on (X, y), imputer), reusing a stored fit of the same configuration and data.
+
+    `model` is an unfitted estimator; its parameters are part of the key. The
+    fitted `imputer` (if any) is stored with it and its statistics are part of
+    the key too; on a hit the stored imputer is returned.
+    """
+    features = list(X.columns) if isinstance(X, pd.DataFrame) else None
+    training_hash = data_hash(X, y)
+    key = model_key(model, features, f"{training_hash}:{_imputer_hash(imputer)}")
+    record = load_model(name, key, model_dir)
+    if record is not None:
+        os.utime(os.path.join(model_dir, name, f"{key}.joblib"))  # keep recently used models from being pruned
+        return record["model"], record["imputer"]
+    model.fit(X, y)
+    save_model(name, key, model, imputer, features, training_hash, model_dir)
+    return model, imputer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the models stored in the registry")
+    parser.add_argument("--dir", default=MODEL_DIR)
+    args = parser.parse_args()
+
+    names = sorted(os.listdir(args.dir)) if os.path.isdir(args.dir) else []
+    for name in names:
+        record = load_latest(name, args.dir)
+        trained = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["trained_at"]))
+        print(f"{name}: {type(record['model']).__name__} trained {trained} on {record['data_hash'][:12]}, "
+              f"{len(record['features'] or [])} features")
@@ -0,0 +1,183 @@
+"""
+Historical grid-to-finish position change per circuit and driver.
+
+Replaces the hand-typed average_position_change_<circuit> dicts. Every stored
+race result contributes finish - grid for each classified driver who started
+from a grid slot (positive means places lost, negative means places gained),
+and the running count, mean and variance are kept per (circuit, driver) with
+Welford's update in dense NumPy arrays:
+
+    lap_store/position_changes.npz
+        circuits, drivers       row/column labels
+        count, mean, m2         (circuits x drivers) Welford state
+        rounds                  race keys already folded in ("2024/08")
+
+Each race is applied once by ingest.py after it is stored, so the index never
+has to be rebuilt from scratch unless a stored race changes.
+
+Usage:
+    python position_changes.py                  # store f1_cache, fold in every race not applied yet
+    python position_changes.py --circuit Monaco
+    average_position_change_monaco = average_position_change("Monaco")
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from lap_store import CACHE_DIR, STORE_DIR, ingest_cache, list_sessions, load_laps
+
+INDEX_NAME = "position_changes.npz"
+
+
+def _round_key(year, round_number):
+    return f"{int(year)}/{int(round_number):02d}"
+
+
+def race_position_changes(year, round_number, store_dir=STORE_DIR):
+    """(drivers, finish - grid) for the classified starters of one stored race."""
+    results = load_laps(year, round_number, "R", ["Driver", "GridPosition", "Position", "ClassifiedPosition"],
+                        "results", store_dir, compact=False)
+    grid = results["GridPosition"].to_numpy(dtype=np.float64)
+    finish = results["Position"].to_numpy(dtype=np.float64)
+    classified = results["ClassifiedPosition"].astype(str).str.isdigit().to_numpy()
+    # grid 0 is a pit-lane start, which says more about the car than the circuit
+    valid = classified & (grid > 0) & np.isfinite(finish)
+    return results["Driver"].astype(str).to_numpy()[valid], (finish - grid)[valid]
+
+
+class PositionChangeIndex:
+    """Dense (circuit x driver) Welford statistics with dict lookups for the labels."""
+
+    def __init__(self, circuits=(), drivers=(), count=None, mean=None, m2=None, rounds=()):
+        self.circuits = list(circuits)
+        self.drivers = list(drivers)
+        shape = (len(self.circuits), len(self.drivers))
+        self.count = np.zeros(shape, dtype=np.int32) if count is None else count
+        self.mean = np.zeros(shape) if mean is None else mean
+        self.m2 = np.zeros(shape) if m2 is None else m2
+        self.rounds = set(rounds)
+        self._circuit_ids = {name.lower(): i for i, name in enumerate(self.circuits)}
+        self._driver_ids = {name: i for i, name in enumerate(self.drivers)}
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        path = os.path.join(store_dir, INDEX_NAME)
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            return cls(data["circuits"].tolist(), data["drivers"].tolist(), data["count"], data["mean"],
+                       data["m2"], data["rounds"].tolist())
+
+    def save(self, store_dir=STORE_DIR):
+        os.makedirs(store_dir, exist_ok=True)
+        path = os.path.join(store_dir, INDEX_NAME)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, circuits=np.array(self.circuits, dtype=str), drivers=np.array(self.drivers, dtype=str),
+                     count=self.count, mean=self.mean, m2=self.m2, rounds=np.array(sorted(self.rounds), dtype=str))
+        os.replace(path + ".tmp", path)
+
+    def _grow(self, circuit, drivers):
+        """Add any unseen circuit row / driver columns, returning their ids."""
+        if circuit.lower() not in self._circuit_ids:
+            self._circuit_ids[circuit.lower()] = len(self.circuits)
+            self.circuits.append(circuit)
+        for driver in drivers:
+            if driver not in self._driver_ids:
+                self._driver_ids[driver] = len(self.drivers)
+                self.drivers.append(driver)
+        rows, cols = len(self.circuits) - self.count.shape[0], len(self.drivers) - self.count.shape[1]
+        if rows or cols:
+            self.count = np.pad(self.count, ((0, rows), (0, cols)))
+            self.mean = np.pad(self.mean, ((0, rows), (0, cols)))
+            self.m2 = np.pad(self.m2, ((0, rows), (0, cols)))
+        return self._circuit_ids[circuit.lower()], np.array([self._driver_ids[d] for d in drivers], dtype=np.intp)
+
+    def add_race(self, key, circuit, drivers, changes):
+        """Fold one race into the statistics; a key that was already applied is ignored."""
+        if key in self.rounds:
+            return False
+        row, cols = self._grow(circuit, drivers)
+        # one observation per driver per race, so the Welford step is a plain vectorized update
+        count = self.count[row, cols] + 1
+        delta = changes - self.mean[row, cols]
+        mean = self.mean[row, cols] + delta / count
+        self.m2[row, cols] += delta * (changes - mean)
+        self.mean[row, cols] = mean
+        self.count[row, cols] = count
+        self.rounds.add(key)
+        return True
+
+    def gather(self, circuit, drivers):
+        """Mean, variance and count for each driver at a circuit; unknown pairs give NaN/0."""
+        drivers = [str(d) for d in drivers]
+        out = pd.DataFrame({"Driver": drivers, "mean": np.nan, "variance": np.nan, "count": 0})
+        row = self._circuit_ids.get(str(circuit).lower())
+        if row is None:
+            return out
+        cols = np.array([self._driver_ids.get(d, -1) for d in drivers], dtype=np.intp)
+        known = cols >= 0
+        count = np.zeros(len(drivers), dtype=np.int64)
+        count[known] = self.count[row, cols[known]]
+        seen = count > 0
+        out["count"] = count
+        out.loc[seen, "mean"] = self.mean[row, cols[seen]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out.loc[seen, "variance"] = self.m2[row, cols[seen]] / (count[seen] - 1)
+        return out
+
+
+def update_index(years=None, store_dir=STORE_DIR, rebuild=False):
+    """Fold every stored race that is not in the index yet. Returns the number of races added."""
+    index = PositionChangeIndex() if rebuild else PositionChangeIndex.load(store_dir)
+    added = 0
+    for year, entry in list_sessions(years, "R", store_dir):
+        key = _round_key(year, entry["round"])
+        if key in index.rounds or "results" not in entry["tables"]:
+            continue
+        drivers, changes = race_position_changes(year, entry["round"], store_dir)
+        added += index.add_race(key, entry["location"], drivers, changes)
+    if added or rebuild:
+        index.save(store_dir)
+    return added
+
+
+def update_position_index(year, round_number, codes, store_dir=STORE_DIR):
+    """ingest.py step: fold a newly stored race in, rebuilding if that race was already counted."""
+    if "R" not in codes:
+        return
+    applied = _round_key(year, round_number) in PositionChangeIndex.load(store_dir).rounds
+    update_index(store_dir=store_dir, rebuild=applied)
+
+
+def average_position_change(circuit, drivers=None, store_dir=STORE_DIR):
+    """
+    {driver: mean finish - grid} at a circuit (its location name, e.g. "Monaco" or "Baku").
+
+    Only reads the index; ingest.py (or this module's CLI) keeps it current.
+    Drivers with no race at the circuit get 0.0.
+    """
+    if not os.path.exists(os.path.join(store_dir, INDEX_NAME)):
+        raise FileNotFoundError(f"No position change index in {store_dir}; "
+                                f"run python ingest.py <year> for the seasons it should cover first")
+    index = PositionChangeIndex.load(store_dir)
+    stats = index.gather(circuit, index.drivers if drivers is None else drivers)
+    return dict(zip(stats["Driver"], stats["mean"].fillna(0.0).round(3)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the per-circuit position change index")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="recompute from every stored race")
+    parser.add_argument("--circuit", help="print the statistics of one circuit")
+    args = parser.parse_args()
+
+    ingest_cache(args.cache, args.store)
+    added = update_index(store_dir=args.store, rebuild=args.rebuild)
+    print(f"{added} race(s) added to {os.path.join(args.store, INDEX_NAME)}")
+    if args.circuit:
+        index = PositionChangeIndex.load(args.store)
+        stats = index.gather(args.circuit, index.drivers)
+        print(stats[stats["count"] > 0].sort_values("mean").to_string(index=False))
@@ -4,6 +4,7 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
+from registry import driver_codes
 
 # Enable FastF1 caching
 fastf1.Cache.enable_cache("f1_cache")
@@ -26,13 +27,7 @@ qualifying_2025 = pd.DataFrame({
 })
 
 # Map full names to FastF1 3-letter codes
-driver_mapping = {
-    "Lando Norris": "NOR", "Oscar Piastri": "PIA", "Max Verstappen": "VER", "George Russell": "RUS",
-    "Yuki Tsunoda": "TSU", "Alexander Albon": "ALB", "Charles Leclerc": "LEC", "Lewis Hamilton": "HAM",
-    "Pierre Gasly": "GAS", "Carlos Sainz": "SAI", "Lance Stroll": "STR", "Fernando Alonso": "ALO"
-}
-
-qualifying_2025["DriverCode"] = qualifying_2025["Driver"].map(driver_mapping)
+qualifying_2025["DriverCode"] = driver_codes(qualifying_2025["Driver"])
 
 # Merge 2025 Qualifying Data with 2024 Race Data
 merged_data = qualifying_2025.merge(laps_2024, left_on="DriverCode", right_on="Driver")
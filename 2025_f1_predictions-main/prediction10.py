@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 import requests
@@ -7,32 +6,10 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-# Enable the FastF1 cache
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
 
 # MODIFIED: Load the 2024 Spanish session data (Round 10)
-session_2024 = fastf1.get_session(2024, 10, "R") 
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-laps_2024.dropna(inplace=True)
-
-# Convert lap and sector times to seconds
-for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-    laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-# Aggregate sector times by driver
-sector_times_2024 = laps_2024.groupby("Driver").agg({
-    "Sector1Time (s)": "mean",
-    "Sector2Time (s)": "mean",
-    "Sector3Time (s)": "mean"
-}).reset_index()
-
-sector_times_2024["TotalSectorTime (s)"] = (
-    sector_times_2024["Sector1Time (s)"] +
-    sector_times_2024["Sector2Time (s)"] +
-    sector_times_2024["Sector3Time (s)"] 
-)
+sector_times_2024 = sector_features(2024, 10, "R")
 
 # Clean air race pace data (this is generally driver-specific, not track-specific)
 clean_air_race_pace = {
@@ -100,7 +77,7 @@ merged_data["RainProbability"] = rain_probability
 merged_data["Temperature"] = temperature
 
 # Filter for drivers present in both datasets
-valid_drivers = merged_data["Driver"].isin(laps_2024["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2024["Driver"])
 merged_data = merged_data[valid_drivers].copy() # Use .copy() to avoid SettingWithCopyWarning
 
 # Define features (X) and target (y)
@@ -108,7 +85,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore", 
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]].copy()
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # Impute missing values for features and target
 imputer_X = SimpleImputer(strategy="median")
@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -6,35 +5,14 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-# Enable the FastF1 cache
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
+from session_loader import session_available
 
 # MODIFIED: Load the 2024 Canadian session data (Round 9)
-try:
-    session_2024 = fastf1.get_session(2024, 9, "R")
-    session_2024.load()
-    laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-    laps_2024.dropna(inplace=True)
-
-    # Convert lap and sector times to seconds
-    for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-        laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-    # Aggregate sector times by driver
-    sector_times_2024 = laps_2024.groupby("Driver").agg({
-        "Sector1Time (s)": "mean",
-        "Sector2Time (s)": "mean",
-        "Sector3Time (s)": "mean"
-    }).reset_index()
-
-    sector_times_2024["TotalSectorTime (s)"] = (
-        sector_times_2024["Sector1Time (s)"] +
-        sector_times_2024["Sector2Time (s)"] +
-        sector_times_2024["Sector3Time (s)"]
-    )
-except Exception as e:
-    print(f"Could not load 2024 Canadian GP data from fastf1. Using placeholder data. Error: {e}")
+if session_available(2024, 9, "R"):
+    sector_times_2024 = sector_features(2024, 9, "R")
+else:
+    print("2024 Canadian GP data is not in f1_cache and offline mode is on. Using placeholder data.")
     # Create placeholder data if API fails
     drivers_list = ["VER", "NOR", "PIA", "LEC", "SAI", "HAM", "RUS", "ALO", "STR", "OCO", "GAS", "TSU", "ALB", "HUL"]
     placeholder_laps = {
@@ -46,6 +24,7 @@ except Exception as e:
         'Driver': drivers_list,
         'TotalSectorTime (s)': np.random.uniform(74, 84, len(drivers_list))
     })
+    sector_times_2024["LapTime (s)"] = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(sector_times_2024["Driver"]).to_numpy()
 
 
 # Clean air race pace data
@@ -115,7 +94,7 @@ merged_data["RainProbability"] = rain_probability
 merged_data["Temperature"] = temperature
 
 # Filter for drivers present in both datasets
-valid_drivers = merged_data["Driver"].isin(laps_2024["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2024["Driver"])
 merged_data = merged_data[valid_drivers].copy()
 
 # Define features (X) and target (y)
@@ -123,7 +102,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore",
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]].copy()
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # Impute missing values
 imputer_X = SimpleImputer(strategy="median")
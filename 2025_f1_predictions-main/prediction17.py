@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -6,39 +5,19 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-# Enable the FastF1 cache
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
+from session_loader import session_available
 
 # MODIFIED: Load the 2024 Dutch session data (Round 15)
-try:
-    session_2024 = fastf1.get_session(2024, 15, "R")
-    session_2024.load()
-    laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-    laps_2024.dropna(inplace=True)
-
-    # Convert lap and sector times to seconds
-    for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-        laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-    # Aggregate sector times by driver
-    sector_times_2024 = laps_2024.groupby("Driver").agg({
-        "Sector1Time (s)": "mean",
-        "Sector2Time (s)": "mean",
-        "Sector3Time (s)": "mean"
-    }).reset_index()
-
-    sector_times_2024["TotalSectorTime (s)"] = (
-        sector_times_2024["Sector1Time (s)"] +
-        sector_times_2024["Sector2Time (s)"] +
-        sector_times_2024["Sector3Time (s)"]
-    )
-except Exception as e:
-    print(f"Could not load 2024 Dutch GP data from fastf1. Using placeholder data. Error: {e}")
+if session_available(2024, 15, "R"):
+    sector_times_2024 = sector_features(2024, 15, "R")
+else:
+    print("2024 Dutch GP data is not in f1_cache and offline mode is on. Using placeholder data.")
     drivers_list = ["VER", "NOR", "PIA", "LEC", "SAI", "HAM", "RUS", "ALO", "STR", "OCO", "GAS", "TSU", "ALB", "HUL", "ANT"]
     placeholder_laps = {'Driver': np.random.choice(drivers_list, 100), 'LapTime (s)': np.random.uniform(73, 83, 100)}
     laps_2024 = pd.DataFrame(placeholder_laps)
     sector_times_2024 = pd.DataFrame({'Driver': drivers_list, 'TotalSectorTime (s)': np.random.uniform(72, 82, len(drivers_list))})
+    sector_times_2024["LapTime (s)"] = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(sector_times_2024["Driver"]).to_numpy()
 
 
 # Clean air race pace data
@@ -110,7 +89,7 @@ qualifying_2025["AveragePositionChange"] = qualifying_2025["Driver"].map(average
 merged_data = qualifying_2025.merge(sector_times_2024[["Driver", "TotalSectorTime (s)"]], on="Driver", how="left")
 merged_data["RainProbability"] = rain_probability
 merged_data["Temperature"] = temperature
-valid_drivers = merged_data["Driver"].isin(laps_2024["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2024["Driver"])
 merged_data = merged_data[valid_drivers].copy()
 
 # Define features (X) and target (y)
@@ -118,7 +97,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore",
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]].copy()
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # Impute, align, and split data
 imputer_X = SimpleImputer(strategy="median")
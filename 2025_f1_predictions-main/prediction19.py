@@ -1,44 +1,26 @@
-import fastf1
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-# Enable the FastF1 cache
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
+from registry import team_lineup
+from model_registry import fit_cached
+from engines import feature_importances, make_model
+from position_changes import average_position_change
+from session_loader import session_available
 
 # Load the 2025 Azerbaijan session data (Round 17) for training
-try:
-    session_2025 = fastf1.get_session(2025, 17, "R")
-    session_2025.load()
-    laps_2025 = session_2025.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-    laps_2025.dropna(inplace=True)
-
-    # Convert lap and sector times to seconds
-    for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-        laps_2025[f"{col} (s)"] = laps_2025[col].dt.total_seconds()
-
-    # Aggregate sector times by driver
-    sector_times_2025 = laps_2025.groupby("Driver").agg({
-        "Sector1Time (s)": "mean",
-        "Sector2Time (s)": "mean",
-        "Sector3Time (s)": "mean"
-    }).reset_index()
-
-    sector_times_2025["TotalSectorTime (s)"] = (
-        sector_times_2025["Sector1Time (s)"] +
-        sector_times_2025["Sector2Time (s)"] +
-        sector_times_2025["Sector3Time (s)"]
-    )
-except Exception as e:
-    print(f"Could not load 2025 Azerbaijan GP data from fastf1. Using placeholder data. Error: {e}")
+if session_available(2025, 17, "R"):
+    sector_times_2025 = sector_features(2025, 17, "R")
+else:
+    print("2025 Azerbaijan GP data is not in f1_cache and offline mode is on. Using placeholder data.")
     drivers_list = ["VER", "SAI", "LAW", "NOR", "PIA", "RUS", "ANT", "LEC", "HAM", "TSU", "ALO", "STR", "OCO", "GAS", "ALB", "HUL", "HAD", "BOR", "PER", "BOT"]
     placeholder_laps = {'Driver': np.random.choice(drivers_list, 200), 'LapTime (s)': np.random.uniform(88, 95, 200)}
     laps_2025 = pd.DataFrame(placeholder_laps)
     sector_times_2025 = pd.DataFrame({'Driver': drivers_list, 'TotalSectorTime (s)': np.random.uniform(87, 94, len(drivers_list))})
+    sector_times_2025["LapTime (s)"] = laps_2025.groupby("Driver")["LapTime (s)"].mean().reindex(sector_times_2025["Driver"]).to_numpy()
 
 # Clean air race pace data (adjusted for Baku 2025: long straights, low downforce; ~88-92s laps)
 clean_air_race_pace = {
@@ -91,32 +73,21 @@ team_points = {
 max_points = max(team_points.values())
 team_performance_score = {team: points / max_points for team, points in team_points.items()}
 
-# Driver to team mapping (2025 grid)
-driver_to_team = {
-    "VER": "Red Bull", "NOR": "McLaren", "PIA": "McLaren", "LEC": "Ferrari", "RUS": "Mercedes",
-    "HAM": "Ferrari", "SAI": "Williams", "ALO": "Aston Martin", "TSU": "Racing Bulls",
-    "OCO": "Haas", "HUL": "Haas", "STR": "Aston Martin", "ALB": "Williams",
-    "ANT": "Mercedes", "LAW": "Racing Bulls", "GAS": "Alpine", "HAD": "Racing Bulls", "BOR": "Kick Sauber",
-    "PER": "Red Bull", "BOT": "Kick Sauber"
-}
+# driver to team mapping at this round
+driver_to_team = team_lineup(2025, 17)
 
 qualifying_2025["Team"] = qualifying_2025["Driver"].map(driver_to_team)
 qualifying_2025["TeamPerformanceScore"] = qualifying_2025["Team"].map(team_performance_score)
 
-# Average position change at Baku (overtaking heaven in straights; positive for midfield chaos-lovers)
-average_position_change_azerbaijan = {
-    "VER": -0.6, "SAI": -0.3, "LAW": 0.2, "NOR": -0.1, "RUS": 0.1, "ANT": 0.3,
-    "LEC": 0.4, "HAM": 0.5, "TSU": 0.6, "ALO": 0.0, "STR": -0.2, "PIA": -0.4,  # Penalize crash
-    "GAS": 0.2, "OCO": -0.1, "ALB": 0.7, "HUL": 0.1, "HAD": 0.5, "BOR": 0.0,
-    "PER": -0.5, "BOT": -0.3
-}
+# average position change at Baku from past races (finish - grid); positive means losing positions
+average_position_change_azerbaijan = average_position_change("Baku", qualifying_2025["Driver"])
 qualifying_2025["AveragePositionChange"] = qualifying_2025["Driver"].map(average_position_change_azerbaijan)
 
 # Merge data
 merged_data = qualifying_2025.merge(sector_times_2025[["Driver", "TotalSectorTime (s)"]], on="Driver", how="left")
 merged_data["RainProbability"] = rain_probability
 merged_data["Temperature"] = temperature
-valid_drivers = merged_data["Driver"].isin(laps_2025["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2025["Driver"])
 merged_data = merged_data[valid_drivers].copy()
 
 # Define features (X) and target (y)
@@ -124,7 +95,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore",
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]].copy()
-y = laps_2025.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2025.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # Impute, align, and split data
 imputer_X = SimpleImputer(strategy="median")
@@ -142,13 +113,16 @@ if len(X) == 0:
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
 
-# Train model
-model = GradientBoostingRegressor(n_estimators=250, learning_rate=0.1, max_depth=3, random_state=42)
-model.fit(X_train, y_train)
+# Train model (reused from the model registry when the data and parameters are unchanged)
+model, imputer_X = fit_cached(
+    "azerbaijan_2025", make_model(n_estimators=250, learning_rate=0.1, max_depth=3, random_state=42),
+    X_train, y_train, imputer_X,
+)
 
 # Debug: Print feature importances
-print("Feature Importances:", model.feature_importances_)
-if np.all(model.feature_importances_ == 0):
+importances = feature_importances(model, X_test, y_test)
+print("Feature Importances:", importances)
+if np.all(importances == 0):
     print("Warning: Zero importances detected—check data variance.")
 
 # Make predictions
@@ -168,7 +142,6 @@ y_pred = model.predict(X_test)
 print(f"\nModel Error (MAE): {mean_absolute_error(y_test, y_pred):.2f} seconds")
 
 # Plot feature importances (FIXED: Debug, grid, higher DPI, scaling hack if needed)
-importances = model.feature_importances_
 if np.all(importances == 0):
     importances = importances + 1e-6  # Tiny hack to avoid empty plot
 
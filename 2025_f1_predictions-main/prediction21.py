@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from form import form_multipliers
 
 print("=" * 60)
 print("2025 MEXICO GP RACE PREDICTION")
@@ -52,17 +53,8 @@ overtaking_ability = {
     "PIA": 0.2     # P8, tough to move up
 }
 
-# 3. Recent form multiplier (1.0 = neutral, <1.0 = boost, >1.0 = penalty)
-recent_form = {
-    "NOR": 1.00,   # Consistent but no recent win
-    "LEC": 0.97,   # 3% BOOST for US P3
-    "HAM": 1.00,   # Steady
-    "RUS": 1.00,   # Steady
-    "VER": 0.95,   # 5% BOOST for US win dominance
-    "ANT": 1.02,   # 2% penalty for rookie nerves
-    "SAI": 1.00,   # Neutral
-    "PIA": 1.00    # Neutral
-}
+# 3. Recent form multiplier (1.0 = neutral, <1.0 = boost, >1.0 = penalty), from the season's race pace EWMA
+recent_form = form_multipliers(qualifying_2025["Driver"], before=(2025, 20))
 
 # 4. Team reliability factor (1.0 = reliable, >1.0 = risk of issues)
 reliability = {
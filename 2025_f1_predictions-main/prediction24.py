@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from form import form_multipliers
+from traffic import circuit_traffic_penalty
+from degradation import circuit_degradation
 
 # Set style
 plt.style.use('ggplot')
@@ -47,16 +50,16 @@ race_pace_qatar = {
 }
 
 # Traffic/Dirty Air Penalty (Crucial at Lusail)
-traffic_penalty = {
-    "PIA": 0.00, "NOR": 0.05, "VER": 0.20, "RUS": 0.25, "ANT": 0.30,
-    "HAD": 0.40, "SAI": 0.50, "ALO": 0.50, "GAS": 0.60, "LEC": 0.70
-}
+# measured from timing intervals: following within 1s vs clean air, in seconds per lap
+traffic_penalty = circuit_traffic_penalty("Qatar", [2023, 2024], qualifying_qatar["Driver"])
 
-# Form / Driver Confidence (Piastri on Pole = High Confidence)
-form_qatar = {
-    "PIA": 0.98, "NOR": 0.99, "VER": 1.00, "RUS": 1.00, "ANT": 1.02,
-    "HAD": 1.01, "SAI": 1.00, "ALO": 1.00, "GAS": 1.00, "LEC": 1.05
-}
+# Tyre wear (Crucial in the heat): fuel-corrected degradation in seconds per lap of tyre age
+tyre_degradation = circuit_degradation("Qatar", [2023, 2024], qualifying_qatar["Driver"])
+# with the 25-lap stint limit the average tyre is ~12 laps old
+AVERAGE_TYRE_AGE = 12.5
+
+# Form from the season's race pace EWMA (1.0 = neutral, <1.0 = in form)
+form_qatar = form_multipliers(qualifying_qatar["Driver"], before=(2025, 23))
 
 # ===============================================
 # 3. CALCULATION
@@ -64,12 +67,14 @@ form_qatar = {
 qatar_results = qualifying_qatar.copy()
 qatar_results["RacePace"] = qatar_results["Driver"].map(race_pace_qatar)
 qatar_results["TrafficPenalty"] = qatar_results["Driver"].map(traffic_penalty)
+qatar_results["TyreWear"] = qatar_results["Driver"].map(tyre_degradation) * AVERAGE_TYRE_AGE
 qatar_results["Form"] = qatar_results["Driver"].map(form_qatar)
 
-# Formula: Pace * Form + Traffic Penalty
+# Formula: Pace * Form + Traffic Penalty + Tyre Wear
 qatar_results["RaceScore"] = (
     qatar_results["RacePace"] * qatar_results["Form"] + 
-    qatar_results["TrafficPenalty"]
+    qatar_results["TrafficPenalty"] +
+    qatar_results["TyreWear"]
 )
 
 qatar_results = qatar_results.sort_values("RaceScore").reset_index(drop=True)
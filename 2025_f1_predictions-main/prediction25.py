@@ -1,5 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from registry import teams_for
+from traffic import circuit_traffic_penalty
 
 # Set style
 plt.style.use('ggplot')
@@ -21,13 +23,12 @@ print("=" * 70)
 # ===============================================
 qualifying_abudhabi = pd.DataFrame({
     "Driver": ["VER", "NOR", "PIA", "RUS", "LEC", "ALO", "BOR", "OCO", "HAD", "TSU"],
-    "Team": ["Red Bull", "McLaren", "McLaren", "Mercedes", "Ferrari",
-             "Aston Martin", "Sauber", "Haas", "RB", "Red Bull"],
     "QualifyingPosition": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
     "QualifyingTime": [82.207, 82.408, 82.437, 82.645, 82.730,
                        82.902, 82.904, 82.913, 83.072, 83.083]
 })
 
+qualifying_abudhabi.insert(1, "Team", teams_for(qualifying_abudhabi["Driver"], 2025, 24))
 qualifying_abudhabi["QualifyingGap"] = qualifying_abudhabi["QualifyingTime"] - qualifying_abudhabi["QualifyingTime"].min()
 
 # ===============================================
@@ -40,10 +41,8 @@ race_pace_abudhabi = {
     "ALO": 95.80, "BOR": 96.00, "OCO": 96.00, "HAD": 96.20, "TSU": 96.20
 }
 
-traffic_penalty_abudhabi = {
-    "VER": 0.00, "NOR": 0.02, "PIA": 0.04, "RUS": 0.05, "LEC": 0.05,
-    "ALO": 0.08, "BOR": 0.10, "OCO": 0.10, "HAD": 0.12, "TSU": 0.12
-}
+# measured from timing intervals: following within 1s vs clean air, in seconds per lap
+traffic_penalty_abudhabi = circuit_traffic_penalty("Abu Dhabi Grand Prix", [2023, 2024], qualifying_abudhabi["Driver"])
 
 form_abudhabi = {
     "VER": 0.990, "NOR": 1.000, "PIA": 0.995, "RUS": 1.000, "LEC": 0.995,
@@ -6,6 +6,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
+from wet_performance import driver_wet_factors
+from standings import standings_before
 
 fastf1.Cache.enable_cache("f1_cache")
 
@@ -27,38 +29,12 @@ qualifying_2025 = pd.DataFrame({
     "QualifyingTime (s)": [90.423, 90.267, 89.841, 90.175, 90.009, 90.772, 90.216, 91.886, 91.303, 90.680, 92.067, 91.886, 92.283]
 })
 
-# add wet performance factor
-driver_wet_performance = {
-    "VER": 0.975196, 
-    "HAM": 0.976464,  
-    "LEC": 0.975862,  
-    "NOR": 0.978179,  
-    "ALO": 0.972655,  
-    "RUS": 0.968678,  
-    "SAI": 0.978754,  
-    "TSU": 0.996338,  
-    "OCO": 0.981810,  
-    "GAS": 0.978832,  
-    "STR": 0.979857   
-}
+# wet performance factor from past wet vs dry races
+driver_wet_performance = driver_wet_factors([2022, 2023, 2024])
 qualifying_2025["WetPerformanceFactor"] = qualifying_2025["Driver"].map(driver_wet_performance)
 
-# add 2025 season points (made-up for now, replace with real values)
-season_points = {
-    "VER": 61,
-    "NOR": 62,    # high! McLaren is strong
-    "PIA": 80,    # high! McLaren is strong
-    "LEC": 20,
-    "RUS": 20,
-    "HAM": 20,
-    "GAS": 20,
-    "ALO": 20,
-    "TSU": 20,
-    "SAI": 20,
-    "HUL": 2,
-    "OCO": 8,
-    "STR": 11
-}
+# add 2025 season points going into Bahrain (round 4), from the stored race and sprint results
+season_points = standings_before(2025, 4)
 qualifying_2025["SeasonPoints"] = qualifying_2025["Driver"].map(season_points)
 
 # weather data
@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 import requests
@@ -6,31 +5,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
+from wet_performance import driver_wet_factors
+from features import sector_features
 
 
-fastf1.Cache.enable_cache("f1_cache")
-
 # Load 2024 Jeddah session
-session_2024 = fastf1.get_session(2024, "Saudi Arabia", "R")
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-laps_2024.dropna(inplace=True)
-
-for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-    laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-# Aggregate sector data by driver
-sector_times_2024 = laps_2024.groupby("Driver").agg({
-    "Sector1Time (s)": "mean",
-    "Sector2Time (s)": "mean",
-    "Sector3Time (s)": "mean"
-}).reset_index()
-
-sector_times_2024["TotalSectorTime (s)"] = (
-    sector_times_2024["Sector1Time (s)"] +
-    sector_times_2024["Sector2Time (s)"] +
-    sector_times_2024["Sector3Time (s)"]
-)
+sector_times_2024 = sector_features(2024, "Saudi Arabia", "R")
 
 # 2025 Bahrain GP quali data (we need to change this before Jeddah)
 qualifying_2025 = pd.DataFrame({
@@ -45,11 +25,8 @@ average_2025 = {
     "OCO": 90.0, "STR": 90.1, "NOR": 90.2
 }
 
-# wet driver performance from the script
-driver_wet_performance = {
-    "VER": 0.975196, "HAM": 0.976464, "LEC": 0.975862, "NOR": 0.978179, "ALO": 0.972655,
-    "RUS": 0.968678, "SAI": 0.978754, "TSU": 0.996338, "OCO": 0.981810, "GAS": 0.978832, "STR": 0.979857
-}
+# wet performance factor from past wet vs dry races
+driver_wet_performance = driver_wet_factors([2022, 2023, 2024])
 qualifying_2025["WetPerformanceFactor"] = qualifying_2025["Driver"].map(driver_wet_performance)
 
 
@@ -99,7 +76,7 @@ merged_data["QualifyingTime"] = merged_data["QualifyingTime"] ** 2
 X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore", "TotalSectorTime (s)", "Average2025Performance"
 ]].fillna(0)
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 clean_data = merged_data.copy()
 clean_data["LapTime (s)"] = y.values
@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 import requests
@@ -7,38 +6,14 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
+from clean_air import driver_clean_air_pace
 
 # load the 2024 miami session data
-session_2024 = fastf1.get_session(2024, "Miami", "R")
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-laps_2024.dropna(inplace=True)
-
-# convert lap and sector times to seconds
-for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-    laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-# aggregate sector times by driver
-sector_times_2024 = laps_2024.groupby("Driver").agg({
-    "Sector1Time (s)": "mean",
-    "Sector2Time (s)": "mean",
-    "Sector3Time (s)": "mean"
-}).reset_index()
-
-sector_times_2024["TotalSectorTime (s)"] = (
-    sector_times_2024["Sector1Time (s)"] +
-    sector_times_2024["Sector2Time (s)"] +
-    sector_times_2024["Sector3Time (s)"]
-)
-
-# clean air race pace from racepace.py
-clean_air_race_pace = {
-    "VER": 93.191067, "HAM": 94.020622, "LEC": 93.418667, "NOR": 93.428600, "ALO": 94.784333,
-    "PIA": 93.232111, "RUS": 93.833378, "SAI": 94.497444, "STR": 95.318250, "HUL": 95.345455,
-    "OCO": 95.682128
-}
+sector_times_2024 = sector_features(2024, "Miami", "R")
+
+# clean air race pace from the 2024 race laps
+clean_air_race_pace = driver_clean_air_pace(2024, "Miami")
 
 # add quali data on Saturday for Miami GP 2025
 qualifying_2025 = pd.DataFrame({
@@ -97,7 +72,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore", 
     "CleanAirRacePace (s)"
 ]]
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # impute missing values for features
 imputer = SimpleImputer(strategy="median")
@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 import requests
@@ -7,39 +6,34 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
+from lazy_session import LazySession
+from registry import team_lineup
+from position_changes import average_position_change
+from clean_air import driver_clean_air_pace
 
-fastf1.Cache.enable_cache("f1_cache")
-
-# load the 2024 Monaco session data
-session_2024 = fastf1.get_session(2024, 8, "R")
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-laps_2024.dropna(inplace=True)
+# load the 2024 Monaco session data; only the lap and sector time columns are decoded
+session_2024 = LazySession(2024, 8, "R")
+laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].dropna()
 
 # convert lap and sector times to seconds
 for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
     laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
 
-# aggregate sector times by driver
+# aggregate sector and lap times by driver
 sector_times_2024 = laps_2024.groupby("Driver").agg({
     "Sector1Time (s)": "mean",
     "Sector2Time (s)": "mean",
-    "Sector3Time (s)": "mean"
+    "Sector3Time (s)": "mean",
+    "LapTime (s)": "mean"
 }).reset_index()
-
-# FIX APPLIED HERE: Changed 'sector_times_2023' to 'sector_times_2024'
 sector_times_2024["TotalSectorTime (s)"] = (
     sector_times_2024["Sector1Time (s)"] +
     sector_times_2024["Sector2Time (s)"] +
-    sector_times_2024["Sector3Time (s)"] 
+    sector_times_2024["Sector3Time (s)"]
 )
 
-# clean air race pace from racepace.py
-clean_air_race_pace = {
-    "VER": 93.191067, "HAM": 94.020622, "LEC": 93.418667, "NOR": 93.428600, "ALO": 94.784333,
-    "PIA": 93.232111, "RUS": 93.833378, "SAI": 94.497444, "STR": 95.318250, "HUL": 95.345455,
-    "OCO": 95.682128
-}
+# clean air race pace from the 2024 race laps
+clean_air_race_pace = driver_clean_air_pace(2024, 8)
 
 # quali data from Monaco GP
 qualifying_2025 = pd.DataFrame({
@@ -81,31 +75,14 @@ team_points = {
 max_points = max(team_points.values())
 team_performance_score = {team: points / max_points for team, points in team_points.items()}
 
-driver_to_team = {
-    "VER": "Red Bull", "NOR": "McLaren", "PIA": "McLaren", "LEC": "Ferrari", "RUS": "Mercedes",
-    "HAM": "Mercedes", "GAS": "Alpine", "ALO": "Aston Martin", "TSU": "Racing Bulls",
-    "SAI": "Ferrari", "HUL": "Kick Sauber", "OCO": "Alpine", "STR": "Aston Martin"
-}
+# driver to team mapping at this round
+driver_to_team = team_lineup(2025, 8)
 
 qualifying_2025["Team"] = qualifying_2025["Driver"].map(driver_to_team)
 qualifying_2025["TeamPerformanceScore"] = qualifying_2025["Team"].map(team_performance_score)
 
-# average position change at Monaco (quali pos - finish pos); positive means losing positions
-average_position_change_monaco = {
-    "VER": -1.0,  
-    "NOR": 1.0,
-    "PIA": 0.2,
-    "RUS": 0.5,
-    "SAI": -0.3,
-    "ALB": 0.8,
-    "LEC": -1.5, 
-    "OCO": -0.2,
-    "HAM": 0.3,
-    "STR": 1.1,
-    "GAS": -0.4,
-    "ALO": -0.6,
-    "HUL": 0.0
-}
+# average position change at Monaco from past races (finish - grid); positive means losing positions
+average_position_change_monaco = average_position_change("Monaco", qualifying_2025["Driver"])
 qualifying_2025["AveragePositionChange"] = qualifying_2025["Driver"].map(average_position_change_monaco)
 
 # merge qualifying and sector times data
@@ -116,7 +93,7 @@ merged_data["Temperature"] = temperature
 # 'QualifyingTime' is already set above: merged_data["QualifyingTime"] = merged_data["QualifyingTime"]
 
 
-valid_drivers = merged_data["Driver"].isin(laps_2024["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2024["Driver"])
 merged_data = merged_data[valid_drivers]
 
 # define features (X) and target (y)
@@ -124,7 +101,7 @@ X = merged_data[[
     "QualifyingTime", "RainProbability", "Temperature", "TeamPerformanceScore", 
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]]
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # impute missing values for features
 imputer = SimpleImputer(strategy="median")
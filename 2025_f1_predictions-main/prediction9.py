@@ -1,4 +1,3 @@
-import fastf1
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -6,31 +5,10 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 from sklearn.impute import SimpleImputer
-
-fastf1.Cache.enable_cache("f1_cache")
+from features import sector_features
 
 # Load the 2024 Singapore GP race session (Round 18)
-session_2024 = fastf1.get_session(2024, 18, "R")
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
-laps_2024.dropna(inplace=True)
-
-# Convert lap and sector times to seconds
-for col in ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]:
-    laps_2024[f"{col} (s)"] = laps_2024[col].dt.total_seconds()
-
-# Aggregate sector times by driver
-sector_times_2024 = laps_2024.groupby("Driver").agg({
-    "Sector1Time (s)": "mean",
-    "Sector2Time (s)": "mean",
-    "Sector3Time (s)": "mean"
-}).reset_index()
-
-sector_times_2024["TotalSectorTime (s)"] = (
-    sector_times_2024["Sector1Time (s)"] +
-    sector_times_2024["Sector2Time (s)"] +
-    sector_times_2024["Sector3Time (s)"] 
-)
+sector_times_2024 = sector_features(2024, 18, "R")
 
 # --- 2025 Prediction Data and Feature Assumptions ---
 
@@ -90,7 +68,7 @@ merged_data["RainProbability"] = rain_probability
 merged_data["Temperature"] = temperature
 
 # Filter to include only drivers present in both prediction input and 2024 race data
-valid_drivers = merged_data["Driver"].isin(laps_2024["Driver"].unique())
+valid_drivers = merged_data["Driver"].isin(sector_times_2024["Driver"])
 merged_data = merged_data[valid_drivers]
 
 # Define features (X) and target (y)
@@ -99,7 +77,7 @@ X = merged_data[[
     "CleanAirRacePace (s)", "AveragePositionChange"
 ]]
 # Target is the average lap time from the 2024 race for the merged drivers
-y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
+y = sector_times_2024.set_index("Driver")["LapTime (s)"].reindex(merged_data["Driver"])
 
 # Impute missing values for features (e.g. if RUS had DNF in quali, or ANT data is missing)
 imputer = SimpleImputer(strategy="median")
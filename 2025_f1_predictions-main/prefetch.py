@@ -0,0 +1,128 @@
+"""
+Fill the FastF1 cache for whole seasons in parallel.
+
+Without this, f1_cache fills lazily the first time each predictionN.py script
+runs. Prefetching loads every requested session with a bounded process pool,
+retrying failed downloads with exponential backoff, so a cold rebuild takes
+roughly as long as the slowest single session instead of the sum of all of them.
+Workers only fill the cache; the manifest is written once by the parent when
+they are done, so concurrent workers never overwrite each other's entries.
+
+Usage:
+    python prefetch.py 2024                              # races of one season
+    python prefetch.py 2023 2024 --sessions R Q FP2 Sprint --workers 6
+    python prefetch.py 2024 --base-url http://127.0.0.1:8765   # local replay server
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fastf1
+import pandas as pd
+from fastf1.exceptions import DataNotLoadedError
+
+from cache_manifest import build_manifest
+from session_loader import CACHE_DIR, PROFILES, enable_cache, load_session, use_base_url
+
+# command line session names -> FastF1 identifiers
+SESSION_TYPES = {
+    "R": "R", "RACE": "R",
+    "Q": "Q", "QUALIFYING": "Q",
+    "S": "S", "SPRINT": "S",
+    "SQ": "SQ", "FP1": "FP1", "FP2": "FP2", "FP3": "FP3",
+}
+
+
+def plan_jobs(first_year, last_year, session_types, base_url=None):
+    """List (year, round, identifier) for every session that has already taken place."""
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    backend = "f1timing" if base_url else None
+    jobs = []
+    for year in range(first_year, last_year + 1):
+        schedule = fastf1.get_event_schedule(year, include_testing=False, backend=backend)
+        for _, event in schedule.iterrows():
+            for identifier in session_types:
+                try:
+                    session_date = event.get_session_date(identifier, utc=True)
+                except ValueError:
+                    continue  # e.g. no sprint at this event
+                if pd.isna(session_date) or session_date > now:
+                    continue
+                jobs.append((year, int(event["RoundNumber"]), identifier))
+    return jobs
+
+
+def check_loaded(session, profile="laps"):
+    """Raise if a payload the profile needs failed to download; Session.load() only logs those."""
+    if session.laps.empty:  # .laps itself raises DataNotLoadedError when the timing data failed
+        raise DataNotLoadedError(f"{session} loaded without any laps")
+    if PROFILES[profile]["weather"]:
+        session.weather_data  # raises DataNotLoadedError as well
+
+
+def fetch_session(job, profile="laps", cache_dir=CACHE_DIR, base_url=None, retries=3, backoff=2.0):
+    """Load one session into the cache, retrying with exponential backoff and jitter."""
+    if base_url:
+        use_base_url(base_url)
+    year, round_number, identifier = job
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            session = load_session(year, round_number, identifier, profile, cache_dir, record=False)
+            check_loaded(session, profile)
+            return job, attempt + 1, time.perf_counter() - start
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+
+def prefetch(jobs, workers=4, profile="laps", cache_dir=CACHE_DIR, base_url=None, retries=3, backoff=2.0):
+    """Fetch all jobs with at most `workers` sessions in flight, then write the manifest. Returns (done, failed)."""
+    done, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_session, job, profile, cache_dir, base_url, retries, backoff): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                _, attempts, elapsed = future.result()
+            except Exception as e:
+                print(f"FAILED {job[0]} round {job[1]} {job[2]}: {e}")
+                failed.append(job)
+                continue
+            print(f"cached {job[0]} round {job[1]} {job[2]} in {elapsed:.1f}s ({attempts} attempt(s))")
+            done.append(job)
+    # workers do not touch the manifest, so it is written once here
+    build_manifest(cache_dir)
+    return done, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch FastF1 sessions into f1_cache")
+    parser.add_argument("first_year", type=int)
+    parser.add_argument("last_year", type=int, nargs="?")
+    parser.add_argument("--sessions", nargs="+", default=["R"], help="R, Q, S/Sprint, SQ, FP1-FP3")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--profile", default="laps")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=2.0, help="base delay in seconds between retries")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--base-url", help="serve FastF1 requests from this host instead of the live APIs")
+    args = parser.parse_args()
+
+    session_types = [SESSION_TYPES[s.upper()] for s in args.sessions]
+    enable_cache(args.cache)
+    if args.base_url:
+        use_base_url(args.base_url)
+
+    start = time.perf_counter()
+    jobs = plan_jobs(args.first_year, args.last_year or args.first_year, session_types, args.base_url)
+    print(f"Prefetching {len(jobs)} session(s) with {args.workers} worker(s)")
+    done, failed = prefetch(jobs, args.workers, args.profile, args.cache, args.base_url, args.retries, args.backoff)
+    print(f"\n{len(done)} cached, {len(failed)} failed in {time.perf_counter() - start:.1f}s")
+    if failed:
+        raise SystemExit(1)
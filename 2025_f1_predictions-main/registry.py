@@ -0,0 +1,168 @@
+"""
+Central driver and team registry with stable integer IDs.
+
+Every script used to carry its own driver_mapping / driver_to_team dict and
+they drifted apart (HAM at Mercedes in one, Ferrari in another; "RB",
+"Racing Bulls" and "Visa Cash App RB" for the same team). This module is the
+single source: teams are identified by constructor lineage (AlphaTauri, RB and
+Racing Bulls are one team; Alfa Romeo, Sauber and Kick Sauber are another),
+drivers by their three-letter code, and SEATS says who drove for whom from
+which round to which round, so the grid is correct at any point in time.
+
+Lookups are vectorized: codes, full names and team aliases go through a
+pandas Index once and everything after that is integer array indexing.
+
+Usage:
+    driver_to_team = team_lineup(2025, 17)                   # {"VER": "Red Bull", "TSU": "Red Bull", ...}
+    laps["TeamId"] = team_of(laps["Driver"], 2024, 19)       # int16, -1 for unknown
+    qualifying["DriverCode"] = driver_codes(qualifying["Driver"])   # "Lando Norris" -> "NOR"
+"""
+import numpy as np
+import pandas as pd
+
+# canonical team names (as the prediction scripts write them); the list position is the team ID
+TEAMS = [
+    "Red Bull", "Mercedes", "Ferrari", "McLaren", "Aston Martin",
+    "Alpine", "Williams", "Racing Bulls", "Kick Sauber", "Haas",
+]
+
+# other spellings seen in FastF1 results and in the scripts (matched case-insensitively)
+TEAM_ALIASES = {
+    "Red Bull Racing": "Red Bull", "Oracle Red Bull Racing": "Red Bull",
+    "Mercedes-AMG": "Mercedes", "Mercedes-AMG Petronas": "Mercedes",
+    "Scuderia Ferrari": "Ferrari",
+    "McLaren F1 Team": "McLaren",
+    "Aston Martin Aramco": "Aston Martin",
+    "Alpine F1 Team": "Alpine", "BWT Alpine F1 Team": "Alpine",
+    "Williams Racing": "Williams",
+    "AlphaTauri": "Racing Bulls", "Scuderia AlphaTauri": "Racing Bulls", "RB": "Racing Bulls",
+    "Visa Cash App RB": "Racing Bulls", "Visa Cash App Racing Bulls": "Racing Bulls",
+    "Alfa Romeo": "Kick Sauber", "Alfa Romeo Racing": "Kick Sauber", "Sauber": "Kick Sauber",
+    "Stake F1 Team Kick Sauber": "Kick Sauber",
+    "Haas F1 Team": "Haas", "MoneyGram Haas F1 Team": "Haas",
+}
+
+# three-letter code and full name; the list position is the driver ID (append only)
+DRIVERS = [
+    ("VER", "Max Verstappen"), ("PER", "Sergio Perez"), ("HAM", "Lewis Hamilton"),
+    ("RUS", "George Russell"), ("LEC", "Charles Leclerc"), ("SAI", "Carlos Sainz"),
+    ("NOR", "Lando Norris"), ("PIA", "Oscar Piastri"), ("ALO", "Fernando Alonso"),
+    ("STR", "Lance Stroll"), ("GAS", "Pierre Gasly"), ("OCO", "Esteban Ocon"),
+    ("ALB", "Alexander Albon"), ("SAR", "Logan Sargeant"), ("BOT", "Valtteri Bottas"),
+    ("ZHO", "Zhou Guanyu"), ("MAG", "Kevin Magnussen"), ("HUL", "Nico Hulkenberg"),
+    ("TSU", "Yuki Tsunoda"), ("DEV", "Nyck de Vries"), ("RIC", "Daniel Ricciardo"),
+    ("LAW", "Liam Lawson"), ("BEA", "Oliver Bearman"), ("COL", "Franco Colapinto"),
+    ("DOO", "Jack Doohan"), ("ANT", "Andrea Kimi Antonelli"), ("HAD", "Isack Hadjar"),
+    ("BOR", "Gabriel Bortoleto"),
+]
+
+# (driver, team, first (year, round), last (year, round) or None while current)
+SEATS = [
+    # 2023
+    ("VER", "Red Bull", (2023, 1), None), ("PER", "Red Bull", (2023, 1), (2024, 24)),
+    ("HAM", "Mercedes", (2023, 1), (2024, 24)), ("RUS", "Mercedes", (2023, 1), None),
+    ("LEC", "Ferrari", (2023, 1), None), ("SAI", "Ferrari", (2023, 1), (2024, 1)),
+    ("NOR", "McLaren", (2023, 1), None), ("PIA", "McLaren", (2023, 1), None),
+    ("ALO", "Aston Martin", (2023, 1), None), ("STR", "Aston Martin", (2023, 1), None),
+    ("GAS", "Alpine", (2023, 1), None), ("OCO", "Alpine", (2023, 1), (2024, 23)),
+    ("ALB", "Williams", (2023, 1), None), ("SAR", "Williams", (2023, 1), (2024, 15)),
+    ("BOT", "Kick Sauber", (2023, 1), (2024, 24)), ("ZHO", "Kick Sauber", (2023, 1), (2024, 24)),
+    ("MAG", "Haas", (2023, 1), (2024, 16)), ("HUL", "Haas", (2023, 1), (2024, 24)),
+    ("TSU", "Racing Bulls", (2023, 1), (2025, 2)),
+    ("DEV", "Racing Bulls", (2023, 1), (2023, 10)),
+    ("RIC", "Racing Bulls", (2023, 11), (2023, 12)),
+    ("LAW", "Racing Bulls", (2023, 13), (2023, 17)),
+    ("RIC", "Racing Bulls", (2023, 18), (2024, 18)),
+    # 2024
+    # stand-ins split the regular driver's seat: BEA for SAI at round 2 and for MAG at rounds 17 and 21
+    ("BEA", "Ferrari", (2024, 2), (2024, 2)), ("SAI", "Ferrari", (2024, 3), (2024, 24)),
+    ("COL", "Williams", (2024, 16), (2024, 24)),
+    ("BEA", "Haas", (2024, 17), (2024, 17)), ("MAG", "Haas", (2024, 18), (2024, 20)),
+    ("LAW", "Racing Bulls", (2024, 19), (2024, 24)),
+    ("BEA", "Haas", (2024, 21), (2024, 21)), ("MAG", "Haas", (2024, 22), (2024, 24)),
+    ("DOO", "Alpine", (2024, 24), (2025, 6)),
+    # 2025
+    ("HAM", "Ferrari", (2025, 1), None), ("ANT", "Mercedes", (2025, 1), None),
+    ("SAI", "Williams", (2025, 1), None),
+    ("OCO", "Haas", (2025, 1), None), ("BEA", "Haas", (2025, 1), None),
+    ("HUL", "Kick Sauber", (2025, 1), None), ("BOR", "Kick Sauber", (2025, 1), None),
+    ("HAD", "Racing Bulls", (2025, 1), None),
+    ("LAW", "Red Bull", (2025, 1), (2025, 2)),
+    ("TSU", "Red Bull", (2025, 3), None), ("LAW", "Racing Bulls", (2025, 3), None),
+    ("COL", "Alpine", (2025, 7), None),
+]
+
+_OPEN = 9999_99  # "still current" as a (year * 100 + round) stamp
+
+_team_index = pd.Index([name.lower() for name in TEAMS + list(TEAM_ALIASES)])
+_team_target = np.array(list(range(len(TEAMS))) + [TEAMS.index(t) for t in TEAM_ALIASES.values()], dtype=np.int16)
+_driver_index = pd.Index([code for code, _ in DRIVERS] + [name.lower() for _, name in DRIVERS])
+_driver_target = np.tile(np.arange(len(DRIVERS), dtype=np.int16), 2)
+
+_seat_driver = np.array([[code for code, _ in DRIVERS].index(d) for d, _, _, _ in SEATS], dtype=np.int16)
+_seat_team = np.array([TEAMS.index(t) for _, t, _, _ in SEATS], dtype=np.int16)
+_seat_first = np.array([y * 100 + r for _, _, (y, r), _ in SEATS])
+_seat_last = np.array([_OPEN if last is None else last[0] * 100 + last[1] for _, _, _, last in SEATS])
+
+
+def _gather(index, target, keys):
+    positions = index.get_indexer(keys)
+    return np.where(positions >= 0, target[positions], -1).astype(np.int16)
+
+
+def team_ids(names):
+    """Team ID for each team name or alias; -1 for unknown names."""
+    return _gather(_team_index, _team_target, pd.Index(names).astype(str).str.lower())
+
+
+def driver_ids(drivers):
+    """Driver ID for each three-letter code or full name; -1 for unknown drivers."""
+    keys = pd.Index(drivers).astype(str)
+    keys = keys.where(keys.str.len() == 3, keys.str.lower())
+    return _gather(_driver_index, _driver_target, keys)
+
+
+def team_names(ids):
+    """Canonical team name for each ID (None for -1)."""
+    names = np.array(TEAMS + [None], dtype=object)
+    return names[np.asarray(ids)]
+
+
+def driver_codes(drivers):
+    """Three-letter code for each code or full name (None if unknown)."""
+    codes = np.array([code for code, _ in DRIVERS] + [None], dtype=object)
+    return codes[driver_ids(drivers)]
+
+
+def canonical_team(names):
+    """Canonical spelling of team names, leaving unknown names as they are."""
+    names = np.asarray(names, dtype=object)
+    ids = team_ids(names)
+    return np.where(ids >= 0, team_names(ids), names)
+
+
+def lineup(year, round_number):
+    """Array indexed by driver ID holding the team ID of that driver at a round (-1 if not on the grid)."""
+    stamp = int(year) * 100 + int(round_number)
+    valid = (_seat_first <= stamp) & (stamp <= _seat_last)
+    teams = np.full(len(DRIVERS), -1, dtype=np.int16)
+    # seats of one driver never overlap, so this is a plain scatter
+    teams[_seat_driver[valid]] = _seat_team[valid]
+    return teams
+
+
+def team_of(drivers, year, round_number):
+    """Team ID of each driver at a round, as one integer gather."""
+    ids = driver_ids(drivers)
+    return np.where(ids >= 0, lineup(year, round_number)[ids], -1).astype(np.int16)
+
+
+def teams_for(drivers, year, round_number):
+    """Canonical team name of each driver at a round."""
+    return team_names(team_of(drivers, year, round_number))
+
+
+def team_lineup(year, round_number):
+    """{driver code: team name} for everyone on the grid at a round, the drop-in for driver_to_team dicts."""
+    teams = lineup(year, round_number)
+    return {DRIVERS[i][0]: TEAMS[t] for i, t in enumerate(teams) if t >= 0}
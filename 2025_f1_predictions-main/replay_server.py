@@ -0,0 +1,156 @@
+"""
+Local stand-in for the FastF1 livetiming and Ergast/Jolpica endpoints.
+
+Serves recorded responses from a fixture directory whose layout mirrors the
+URL paths, with optional latency and bandwidth throttling, so cold-cache loads
+can be benchmarked and tested without network access:
+
+    fixtures/static/2024/Index.json
+    fixtures/static/2024/2024-10-20_United_States_Grand_Prix/2024-10-20_Race/TimingData.jsonStream
+    fixtures/ergast/f1/2024/19/results.json__limit%3D100%26offset%3D0
+    fixtures/schedule/schedule_2024.json
+
+Usage:
+    python replay_server.py fixtures --record              # record misses from the live APIs once
+    python replay_server.py fixtures --latency 0.05 --bandwidth 2MB
+    python prefetch.py 2024 --base-url http://127.0.0.1:8765 --cache /tmp/cold_cache
+
+Point FastF1 at a running server with session_loader.use_base_url(). Use a
+fresh cache folder for cold-cache numbers, since FastF1 keeps its HTTP cache
+inside the cache folder.
+"""
+import argparse
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from cache_manager import parse_size
+
+FIXTURE_DIR = "fixtures"
+DEFAULT_PORT = 8765
+CHUNK_SIZE = 16 * 1024
+
+# path prefix -> live URL prefix it is recorded from
+UPSTREAM = {
+    "/static/": "https://livetiming.formula1.com/static/",
+    "/ergast/": "https://api.jolpi.ca/ergast/",
+    "/schedule/": "https://raw.githubusercontent.com/theOehrly/f1schedule/master/",
+}
+
+CONTENT_TYPES = {".json": "application/json", ".jsonStream": "text/plain", ".xml": "application/xml"}
+
+
+def fixture_path(fixture_dir, url_path):
+    """Map a request path (with query string) to its file in the fixture directory."""
+    parts = urlsplit(url_path)
+    name = parts.path.lstrip("/")
+    if parts.query:
+        name += "__" + quote(parts.query, safe="")
+    path = os.path.normpath(os.path.join(fixture_dir, name))
+    if not path.startswith(os.path.normpath(fixture_dir) + os.sep):
+        return None  # refuse paths escaping the fixture directory
+    return path
+
+
+def _record(url_path, path):
+    for prefix, upstream in UPSTREAM.items():
+        if url_path.startswith(prefix):
+            with urllib.request.urlopen(upstream + url_path[len(prefix):], timeout=30) as response:
+                body = response.read()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+            return True
+    return False
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        path = fixture_path(server.fixture_dir, self.path)
+        if path is None:
+            self.send_error(400)
+            return
+        if not os.path.isfile(path) and server.record:
+            try:
+                _record(self.path, path)
+            except OSError as e:
+                self.log_error("recording %s failed: %s", self.path, e)
+        if not os.path.isfile(path):
+            self.send_error(404, f"No fixture for {self.path}")
+            return
+        server.served.append(self.path)  # before replying, so a client that got the body sees it
+
+        with open(path, "rb") as f:
+            body = f.read()
+        if server.latency:
+            time.sleep(server.latency)
+        extension = os.path.splitext(urlsplit(self.path).path)[1]
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES.get(extension, "application/octet-stream"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self._send_throttled(body)
+
+    def _send_throttled(self, body):
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start:start + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(fixture_dir=FIXTURE_DIR, host="127.0.0.1", port=DEFAULT_PORT,
+                latency=0.0, bandwidth=None, record=False, quiet=False):
+    """
+    Create the replay server; latency in seconds per request, bandwidth in bytes per second.
+
+    server.served lists the paths answered from fixtures, in order.
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.fixture_dir = fixture_dir
+    server.latency = latency
+    server.bandwidth = bandwidth
+    server.record = record
+    server.quiet = quiet
+    server.served = []
+    return server
+
+
+def start_in_thread(fixture_dir=FIXTURE_DIR, port=0, **options):
+    """Start a server on a background thread. Returns (server, base_url); call server.shutdown() when done."""
+    server = make_server(fixture_dir, port=port, quiet=True, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded FastF1/Ergast responses locally")
+    parser.add_argument("fixture_dir", nargs="?", default=FIXTURE_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--bandwidth", help="throttle responses, e.g. 2MB (per second)")
+    parser.add_argument("--record", action="store_true", help="fetch and save fixtures that are missing")
+    args = parser.parse_args()
+
+    bandwidth = parse_size(args.bandwidth) if args.bandwidth else None
+    server = make_server(args.fixture_dir, args.host, args.port, args.latency, bandwidth, args.record)
+    print(f"Replaying {args.fixture_dir} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,111 @@
+"""
+Shared FastF1 session loader.
+
+The prediction scripts only read lap and sector columns from session.laps, but
+a bare session.load() also parses telemetry, position data, weather and race
+control messages. A load profile says up front which payloads a prediction
+needs, so everything else is skipped:
+
+    session_2024 = load_session(2024, 8, "R")                 # laps only
+    session_2024 = load_session(2024, 8, "R", "laps+weather")
+
+Setting F1_OFFLINE=1 (or calling set_offline(True)) turns on strict offline
+mode: sessions that are not fully listed in the cache manifest raise
+FileNotFoundError immediately instead of being fetched from the network.
+Setting F1_CACHE_BUDGET (e.g. "2GB") keeps f1_cache under that size after
+every load, see cache_manager.py.
+"""
+import os
+
+import fastf1
+
+from cache_manager import CacheManager, parse_size
+from cache_manifest import CACHE_DIR, is_round_cached, record_session, require_cached
+
+# keyword arguments handed to Session.load() for each profile
+PROFILES = {
+    "laps": {"laps": True, "telemetry": False, "weather": False, "messages": False},
+    "laps+weather": {"laps": True, "telemetry": False, "weather": True, "messages": False},
+    "laps+telemetry": {"laps": True, "telemetry": True, "weather": False, "messages": False},
+    "full": {"laps": True, "telemetry": True, "weather": True, "messages": True},
+}
+
+_enabled_cache_dir = None
+_offline = os.environ.get("F1_OFFLINE", "") not in ("", "0")
+_cache_manager = None
+
+
+def enable_cache(cache_dir=CACHE_DIR):
+    """Enable the FastF1 cache once per process, creating the folder if it's missing."""
+    global _enabled_cache_dir
+    if _enabled_cache_dir == cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    fastf1.Cache.enable_cache(cache_dir)
+    fastf1.Cache.offline_mode(_offline)
+    _enabled_cache_dir = cache_dir
+    if os.environ.get("F1_CACHE_BUDGET"):
+        set_cache_budget(parse_size(os.environ["F1_CACHE_BUDGET"]), os.environ.get("F1_CACHE_POLICY", "value"))
+
+
+def set_cache_budget(budget_bytes, policy="value"):
+    """Keep the enabled cache under budget_bytes after every load; None turns it off."""
+    global _cache_manager
+    if budget_bytes is None:
+        _cache_manager = None
+        return
+    _cache_manager = CacheManager(_enabled_cache_dir or CACHE_DIR, budget_bytes, policy)
+
+
+def set_offline(enabled=True):
+    """Turn strict offline mode on or off for this process."""
+    global _offline
+    _offline = enabled
+    if _enabled_cache_dir is not None:
+        fastf1.Cache.offline_mode(enabled)
+
+
+def is_offline():
+    return _offline
+
+
+def session_available(year, gp, identifier, profile="laps", cache_dir=CACHE_DIR):
+    """True if load_session() can be called without failing on offline mode."""
+    return not _offline or is_round_cached(year, gp, identifier, profile, cache_dir)
+
+
+def load_session(year, gp, identifier, profile="laps", cache_dir=CACHE_DIR, record=True):
+    """
+    Return a FastF1 session loaded with only the payloads named by the profile.
+
+    Newly downloaded sessions are added to the cache manifest unless record is
+    False (parallel workers leave that to their parent, see prefetch.py).
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown load profile {profile!r}, expected one of {sorted(PROFILES)}")
+    if _offline:
+        require_cached(year, gp, identifier, profile, cache_dir)
+    enable_cache(cache_dir)
+    was_cached = _offline or is_round_cached(year, gp, identifier, profile, cache_dir)
+    session = fastf1.get_session(year, gp, identifier)
+    session.load(**PROFILES[profile])
+    if record and not was_cached:
+        record_session(session, cache_dir)
+    if _cache_manager is not None:
+        _cache_manager.record_load(session, hit=was_cached)
+        _cache_manager.enforce()
+    return session
+
+
+def use_base_url(base_url):
+    """Send FastF1 livetiming, schedule and Ergast requests to base_url, e.g. a local replay server."""
+    from fastf1 import _api as api
+    from fastf1 import events
+    from fastf1.ergast import interface as ergast
+
+    base_url = base_url.rstrip("/")
+    api.base_url = base_url
+    # FastF1 retries livetiming misses on its mirror; keep those local too
+    api.base_url_mirror = base_url
+    events._SCHEDULE_BASE_URL = f"{base_url}/schedule/"
+    ergast.BASE_URL = f"{base_url}/ergast/f1"
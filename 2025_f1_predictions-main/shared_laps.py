@@ -0,0 +1,143 @@
+"""
+Share one copy of the historical lap arrays between prediction processes.
+
+A loader process publishes normalized lap columns into POSIX shared memory;
+worker processes attach read-only and get a DataFrame whose columns are views
+over those buffers, so memory grows with the data and not with the number of
+workers, and no worker has to deserialize anything at startup.
+
+    # loader (keeps the segments alive until it exits)
+    python shared_laps.py laps_hist 2023 2024
+
+    # in a worker
+    shared = attach("laps_hist")
+    laps = shared.frame
+    ...
+    shared.close()
+"""
+import argparse
+import json
+import signal
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from lap_store import STORE_DIR, load_history
+
+_LENGTH = struct.Struct("<Q")
+
+
+def _create(name, nbytes):
+    return shared_memory.SharedMemory(name=name, create=True, size=max(int(nbytes), 1))
+
+
+def _open(name):
+    """Attach without letting this process's resource tracker unlink the segment on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedFrame:
+    """A DataFrame backed by shared memory segments; close() releases this process's mapping."""
+
+    def __init__(self, frame, segments, owner=False):
+        self.frame = frame
+        self._segments = segments
+        self._owner = owner
+
+    def close(self):
+        self.frame = None
+        for shm in self._segments:
+            shm.close()
+            if self._owner:
+                shm.unlink()
+        self._segments = []
+
+
+def _column_buffers(series):
+    """Split a column into plain arrays plus what is needed to rebuild it."""
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        # object arrays hold pointers into this process; share strings as categories (as normalize_laps does)
+        series = series.astype("category")
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return [series.cat.codes.to_numpy()], {"kind": "category", "categories": [str(c) for c in dtype.categories]}
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        if not hasattr(dtype, "numpy_dtype"):
+            raise TypeError(f"Column {series.name!r} of dtype {dtype} cannot be shared")
+        # nullable ints/floats/bools: data and mask are shared separately
+        values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return [values, series.isna().to_numpy()], {"kind": "masked", "dtype": str(dtype)}
+    return [series.to_numpy()], {"kind": "plain"}
+
+
+def publish(frame, name):
+    """Copy a lap frame into shared memory under `name`. Returns the owning SharedFrame."""
+    segments, layout = [], {"columns": []}
+    for i, column in enumerate(frame.columns):
+        buffers, entry = _column_buffers(frame[column])
+        entry.update({"name": column, "buffers": []})
+        for j, values in enumerate(buffers):
+            values = np.ascontiguousarray(values)
+            shm = _create(f"{name}_{i}_{j}", values.nbytes)
+            np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+            segments.append(shm)
+            entry["buffers"].append({"segment": shm.name, "dtype": values.dtype.str, "shape": list(values.shape)})
+        layout["columns"].append(entry)
+
+    payload = json.dumps(layout).encode()
+    header = _create(f"{name}_layout", _LENGTH.size + len(payload))
+    header.buf[:_LENGTH.size] = _LENGTH.pack(len(payload))
+    header.buf[_LENGTH.size:_LENGTH.size + len(payload)] = payload
+    segments.append(header)
+    return SharedFrame(frame, segments, owner=True)
+
+
+def attach(name):
+    """Rebuild a read-only DataFrame view over the segments published as `name`."""
+    header = _open(f"{name}_layout")
+    (length,) = _LENGTH.unpack(bytes(header.buf[:_LENGTH.size]))
+    layout = json.loads(bytes(header.buf[_LENGTH.size:_LENGTH.size + length]))
+
+    segments, data = [header], {}
+    for entry in layout["columns"]:
+        arrays = []
+        for buffer in entry["buffers"]:
+            shm = _open(buffer["segment"])
+            segments.append(shm)
+            values = np.ndarray(tuple(buffer["shape"]), np.dtype(buffer["dtype"]), buffer=shm.buf)
+            values.flags.writeable = False
+            arrays.append(values)
+        if entry["kind"] == "category":
+            data[entry["name"]] = pd.Categorical.from_codes(arrays[0], categories=entry["categories"])
+        elif entry["kind"] == "masked":
+            array_type = pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()
+            data[entry["name"]] = array_type(arrays[0], arrays[1])
+        else:
+            data[entry["name"]] = arrays[0]
+    # copy=False keeps every column a view over its segment
+    return SharedFrame(pd.DataFrame(data, copy=False), segments)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish historical laps into shared memory")
+    parser.add_argument("name")
+    parser.add_argument("years", type=int, nargs="+")
+    parser.add_argument("--session", default="R")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    shared = publish(load_history(args.years, args.session, store_dir=args.store), args.name)
+    print(f"Published {len(shared.frame)} laps as {args.name!r}; Ctrl-C to release")
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shared.close()
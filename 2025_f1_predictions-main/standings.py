@@ -0,0 +1,148 @@
+"""
+Driver and constructor standings timeline computed from stored results.
+
+Replaces the retyped team_points / season_points dicts. Points from every
+stored race and sprint result of a season are summed into dense cumulative
+(round x entity) arrays, so the standings before or after any round are a
+single row lookup:
+
+    lap_store/<year>/standings.npz
+        drivers, teams              column labels
+        driver_points, team_points  row r = cumulative points after round r (row 0 is all zeros)
+        sessions                    result tables the arrays were built from ("05_S", "05_R", ...)
+
+The arrays are rebuilt only when the season's set of stored race/sprint
+results changes, which ingest.py does after every round.
+
+Usage:
+    python standings.py 2025 --before 17
+    season_points = standings_before(2025, 4)                    # {"PIA": 49.0, ...}
+    team_points = standings_before(2025, 4, "team")
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from lap_store import STORE_DIR, list_sessions, load_laps
+from registry import canonical_team
+
+STANDINGS_NAME = "standings.npz"
+POINTS_SESSIONS = ("S", "R")
+
+
+def _path(year, store_dir):
+    return os.path.join(store_dir, str(int(year)), STANDINGS_NAME)
+
+
+def _points_sessions(year, store_dir):
+    """Index entries of the season's stored race and sprint results, keyed like "05_S"."""
+    return {
+        f"{entry['round']:02d}_{entry['session']}": entry
+        for _, entry in list_sessions([year], None, store_dir)
+        if entry["session"] in POINTS_SESSIONS and "results" in entry["tables"]
+    }
+
+
+class Standings:
+    """Cumulative points of one season, one row per round."""
+
+    def __init__(self, year, drivers, teams, driver_points, team_points, sessions):
+        self.year = year
+        self.drivers = list(drivers)
+        self.teams = list(teams)
+        self.driver_points = driver_points
+        self.team_points = team_points
+        self.sessions = list(sessions)
+
+    @classmethod
+    def compute(cls, year, store_dir=STORE_DIR):
+        """Build the arrays from the stored results of every race and sprint in the season."""
+        sessions = _points_sessions(year, store_dir)
+        frames = []
+        for key, entry in sorted(sessions.items()):
+            results = load_laps(year, entry["round"], entry["session"], ["Driver", "Team", "Points"],
+                                "results", store_dir, compact=False)
+            results["Round"] = entry["round"]
+            frames.append(results.astype({"Driver": str, "Team": str}))
+        if not frames:
+            raise FileNotFoundError(f"No stored race or sprint results for {year} in {store_dir}; "
+                                f"run python ingest.py {year} first")
+        results = pd.concat(frames, ignore_index=True)
+        # one column per constructor lineage, named the way the scripts write team_points
+        results["Team"] = canonical_team(results["Team"])
+
+        rounds = results["Round"].to_numpy()
+        points = np.nan_to_num(results["Points"].to_numpy(dtype=np.float64))
+        drivers, driver_ids = np.unique(results["Driver"].to_numpy(), return_inverse=True)
+        teams, team_ids = np.unique(results["Team"].to_numpy(), return_inverse=True)
+
+        # points scored in each round, then a running sum down the rounds
+        driver_points = np.zeros((rounds.max() + 1, len(drivers)))
+        team_points = np.zeros((rounds.max() + 1, len(teams)))
+        np.add.at(driver_points, (rounds, driver_ids), points)
+        np.add.at(team_points, (rounds, team_ids), points)
+        return cls(year, drivers, teams, driver_points.cumsum(axis=0), team_points.cumsum(axis=0), sorted(sessions))
+
+    @classmethod
+    def load(cls, year, store_dir=STORE_DIR):
+        """Stored standings of a season, recomputed first if its results changed since they were built."""
+        path = _path(year, store_dir)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                standings = cls(year, data["drivers"].tolist(), data["teams"].tolist(), data["driver_points"],
+                                data["team_points"], data["sessions"].tolist())
+            if standings.sessions == sorted(_points_sessions(year, store_dir)):
+                return standings
+        standings = cls.compute(year, store_dir)
+        standings.save(store_dir)
+        return standings
+
+    def save(self, store_dir=STORE_DIR):
+        path = _path(self.year, store_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, drivers=np.array(self.drivers, dtype=str), teams=np.array(self.teams, dtype=str),
+                     driver_points=self.driver_points, team_points=self.team_points,
+                     sessions=np.array(self.sessions, dtype=str))
+        os.replace(path + ".tmp", path)
+
+    def after(self, round_number, kind="driver"):
+        """Points of every driver (or team) after a round; rounds past the last stored one clamp to it."""
+        if kind not in ("driver", "team"):
+            raise ValueError(f"Unknown standings kind {kind!r}, expected 'driver' or 'team'")
+        points = self.driver_points if kind == "driver" else self.team_points
+        names = self.drivers if kind == "driver" else self.teams
+        row = points[min(max(int(round_number), 0), len(points) - 1)]
+        return pd.Series(row, index=names, name="Points")
+
+    def before(self, round_number, kind="driver"):
+        return self.after(int(round_number) - 1, kind)
+
+
+def update_standings(year, round_number, codes, store_dir=STORE_DIR):
+    """ingest.py step: rebuild the season's standings when a race or sprint was stored."""
+    if any(code in POINTS_SESSIONS for code in codes):
+        Standings.compute(year, store_dir).save(store_dir)
+
+
+def standings_before(year, round_number, kind="driver", store_dir=STORE_DIR):
+    """{name: points} going into a round, e.g. the constructors' table before round 17."""
+    return Standings.load(year, store_dir).before(round_number, kind).to_dict()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Driver and constructor standings from stored results")
+    parser.add_argument("year", type=int)
+    parser.add_argument("--before", type=int, help="standings going into this round (default: latest)")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    standings = Standings.load(args.year, args.store)
+    last_round = len(standings.driver_points) - 1
+    after = last_round if args.before is None else args.before - 1
+    for kind in ("driver", "team"):
+        table = standings.after(after, kind).sort_values(ascending=False)
+        print(f"\n{kind.title()} standings after round {after}:")
+        print(table.to_string())
@@ -0,0 +1,75 @@
+"""
+Replay server tests: fixtures are served locally, and a session loads through
+session_loader.use_base_url() without touching the live APIs.
+
+The session test replays fixtures recorded for REPLAY_SESSION from
+F1_REPLAY_FIXTURES (default: fixtures/). Record them once, with network access:
+
+    F1_REPLAY_RECORD=1 python -m pytest test_replay_server.py
+"""
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+from replay_server import FIXTURE_DIR, fixture_path, start_in_thread
+
+FIXTURES = os.environ.get("F1_REPLAY_FIXTURES", FIXTURE_DIR)
+RECORD = os.environ.get("F1_REPLAY_RECORD", "") not in ("", "0")
+REPLAY_SESSION = (2024, 19, "R")
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(fixture_dir, **options):
+        server, base_url = start_in_thread(fixture_dir, **options)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serves_fixtures(tmp_path, serve):
+    (tmp_path / "static" / "2024").mkdir(parents=True)
+    (tmp_path / "static" / "2024" / "Index.json").write_bytes(b'{"Year": 2024}')
+    server, base_url = serve(str(tmp_path))
+
+    with urllib.request.urlopen(f"{base_url}/static/2024/Index.json") as response:
+        assert response.read() == b'{"Year": 2024}'
+    with pytest.raises(urllib.error.HTTPError) as missing:
+        urllib.request.urlopen(f"{base_url}/static/2023/Index.json")
+    assert missing.value.code == 404
+    assert server.served == ["/static/2024/Index.json"]
+    assert fixture_path(str(tmp_path), "/../outside.json") is None
+
+
+def test_load_session_through_replay_server(tmp_path, serve, monkeypatch):
+    pytest.importorskip("fastf1")
+    from fastf1 import _api as api
+    from fastf1 import events
+    from fastf1.ergast import interface as ergast
+
+    import session_loader
+
+    if not RECORD and not os.path.isdir(os.path.join(FIXTURES, "static")):
+        pytest.skip(f"no recorded fixtures in {FIXTURES}; record them with F1_REPLAY_RECORD=1")
+    # use_base_url patches module globals; restore the live URLs afterwards
+    for module, name in [(api, "base_url"), (api, "base_url_mirror"), (events, "_SCHEDULE_BASE_URL"),
+                         (ergast, "BASE_URL")]:
+        monkeypatch.setattr(module, name, getattr(module, name))
+    monkeypatch.setattr(session_loader, "_enabled_cache_dir", None)
+    monkeypatch.setattr(session_loader, "_offline", False)
+
+    server, base_url = serve(FIXTURES, record=RECORD)
+    session_loader.use_base_url(base_url)
+    # a fresh cache folder, so every payload has to come over HTTP
+    session = session_loader.load_session(*REPLAY_SESSION, cache_dir=str(tmp_path / "cache"))
+
+    assert not session.laps.empty
+    assert any(path.startswith(f"/static/{REPLAY_SESSION[0]}/") for path in server.served)
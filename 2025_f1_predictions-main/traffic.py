@@ -0,0 +1,157 @@
+"""
+Traffic / dirty-air penalty measured from timing intervals.
+
+Replaces the guessed traffic_penalty dicts. At ingest every stored race and
+sprint lap gets an IntervalAhead column: the time between the car one position
+ahead crossing the line at the end of the same lap and this car crossing it,
+from the public lap Time and Position columns (NaN when the position is
+unknown, or when the car ahead crossed before this lap began, i.e. it is a lap
+or more up and not being followed). ingest.py writes it for each new round and
+`python traffic.py` backfills older ones; lookups only read it. A driver's
+penalty is then their mean lap time while following within FOLLOW_GAP seconds
+minus their mean lap time with at least CLEAN_GAP seconds of clear air, using
+green-flag, non-pit laps and fuel-corrected times when they are stored (early
+laps are both heavier and more crowded).
+
+All sessions are handled in one grouped pass with np.bincount, and the
+per-session table is cached like the other features.
+
+Usage:
+    python traffic.py                                # backfill IntervalAhead for stored races
+    traffic_penalty = circuit_traffic_penalty("Qatar", [2023, 2024], drivers)
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from clean_air import NEUTRALISED_STATUS
+from features import cached, input_hash
+from fuel import COLUMN as FUEL_COLUMN, has_fuel_correction
+from lap_store import STORE_DIR, add_column, find_session, list_sessions, load_laps, read_columns
+
+COLUMN = "IntervalAhead"
+INTERVAL_SESSIONS = ("R", "S")
+FOLLOW_GAP = 1.0
+CLEAN_GAP = 2.0
+MIN_LAPS = 3
+
+COLUMNS = ["Driver", "LapNumber", "LapTime", "PitInTime", "PitOutTime", "TrackStatus", COLUMN]
+
+
+def lap_intervals(year, round_number, identifier, store_dir=STORE_DIR):
+    """Seconds to the car one position ahead at each stored lap's line crossing; NaN if it is a lap up."""
+    laps = load_laps(year, round_number, identifier, ["LapNumber", "Position", "Time", "LapTime"],
+                     store_dir=store_dir, compact=False)
+    # the car ahead's crossing of the same lap, matched on (lap, position - 1)
+    ahead = (laps[["LapNumber", "Position", "Time (s)"]].dropna().drop_duplicates(["LapNumber", "Position"])
+             .assign(Position=lambda frame: frame["Position"] + 1)
+             .rename(columns={"Time (s)": "AheadTime (s)"}))
+    merged = laps.merge(ahead, on=["LapNumber", "Position"], how="left")
+    intervals = (merged["Time (s)"] - merged["AheadTime (s)"]).to_numpy(dtype=np.float64, na_value=np.nan)
+    # the car ahead finished this lap before this car started it: a lap or more up
+    lapped = intervals >= merged["LapTime (s)"].to_numpy(dtype=np.float64, na_value=np.inf)
+    intervals[lapped] = np.nan
+    return intervals
+
+
+def write_intervals(year, round_number, codes, store_dir=STORE_DIR):
+    """Store the IntervalAhead column for the race and sprint of a round (an ingest.py step)."""
+    for code in codes:
+        if code in INTERVAL_SESSIONS:
+            intervals = lap_intervals(year, round_number, code, store_dir)
+            add_column(year, round_number, code, "laps", COLUMN, pd.to_timedelta(intervals, unit="s"), store_dir)
+
+
+def has_intervals(year, gp, identifier, store_dir=STORE_DIR):
+    return COLUMN in read_columns(year, gp, identifier, [], store_dir=store_dir)[1]["columns"]
+
+
+def backfill(years=None, store_dir=STORE_DIR, force=False):
+    """Add IntervalAhead to every stored race and sprint that lacks it. Returns how many were written."""
+    written = 0
+    for year, entry in list_sessions(years, None, store_dir):
+        if entry["session"] not in INTERVAL_SESSIONS:
+            continue
+        if force or not has_intervals(year, entry["round"], entry["session"], store_dir):
+            write_intervals(year, entry["round"], [entry["session"]], store_dir)
+            written += 1
+    return written
+
+
+def traffic_penalties(laps, follow_gap=FOLLOW_GAP, clean_gap=CLEAN_GAP, min_laps=MIN_LAPS, by=("Year", "Round")):
+    """Per session and driver: mean following lap minus mean clean-air lap, for any number of sessions."""
+    time_column = f"{FUEL_COLUMN} (s)" if f"{FUEL_COLUMN} (s)" in laps.columns else "LapTime (s)"
+    lap_time = laps[time_column].to_numpy(dtype=np.float64, na_value=np.nan)
+    interval = laps[f"{COLUMN} (s)"].to_numpy(dtype=np.float64, na_value=np.nan)
+    green = (
+        np.isfinite(lap_time)
+        & laps["PitInTime (s)"].isna().to_numpy()
+        & laps["PitOutTime (s)"].isna().to_numpy()
+        & (laps["LapNumber"].to_numpy(dtype=np.float64, na_value=np.nan) > 1)
+        & ~laps["TrackStatus"].astype(str).str.contains(f"[{NEUTRALISED_STATUS}]", regex=True).to_numpy()
+    )
+    following = green & (interval < follow_gap)
+    clean = green & (interval >= clean_gap)
+
+    keys = [column for column in by if column in laps.columns]
+    group_ids, _ = pd.MultiIndex.from_arrays([laps[k] for k in keys] + [laps["Driver"].astype(str)]).factorize()
+    n_groups = group_ids.max() + 1 if len(group_ids) else 0
+    follow_n = np.bincount(group_ids[following], minlength=n_groups)
+    clean_n = np.bincount(group_ids[clean], minlength=n_groups)
+    follow_sum = np.bincount(group_ids[following], weights=lap_time[following], minlength=n_groups)
+    clean_sum = np.bincount(group_ids[clean], weights=lap_time[clean], minlength=n_groups)
+
+    first = np.unique(group_ids, return_index=True)[1]
+    result = laps.iloc[first][keys + ["Driver"]].reset_index(drop=True)
+    result["Driver"] = result["Driver"].astype(str)
+    result["FollowingLaps"] = follow_n
+    result["CleanLaps"] = clean_n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["TrafficPenalty (s)"] = follow_sum / follow_n - clean_sum / clean_n
+    usable = (follow_n >= min_laps) & (clean_n >= min_laps)
+    return result[usable].reset_index(drop=True)
+
+
+def session_traffic_penalty(year, gp, identifier="R", store_dir=STORE_DIR):
+    """Traffic penalty table of one session, computed once and cached. Only reads the store."""
+    if find_session(year, gp, identifier, store_dir)[0] is None or not has_intervals(year, gp, identifier, store_dir):
+        raise FileNotFoundError(f"{year} {gp} {identifier} has no {COLUMN} column in {store_dir}; "
+                                f"run python ingest.py {year} <round> or python traffic.py {year} first")
+    columns = COLUMNS + ([FUEL_COLUMN] if has_fuel_correction(year, gp, identifier, store_dir) else [])
+    key = input_hash(year, gp, identifier, columns, store_dir=store_dir)
+    return cached(
+        "traffic_penalty", key,
+        lambda: traffic_penalties(load_laps(year, gp, identifier, columns, store_dir=store_dir)),
+    )
+
+
+def circuit_traffic_penalty(circuit, years, drivers=None, identifier="R", store_dir=STORE_DIR):
+    """
+    {driver: penalty in seconds} at a circuit over several seasons, weighted by following laps.
+
+    Drivers without enough following and clean laps there get 0.0.
+    """
+    tables = [session_traffic_penalty(year, circuit, identifier, store_dir) for year in years]
+    penalties = pd.concat(tables, ignore_index=True)
+    penalties["Weighted"] = penalties["TrafficPenalty (s)"] * penalties["FollowingLaps"]
+    totals = penalties.groupby("Driver")[["Weighted", "FollowingLaps"]].sum()
+    penalty = (totals["Weighted"] / totals["FollowingLaps"]).round(3)
+    if drivers is not None:
+        penalty = penalty.reindex([str(d) for d in drivers]).fillna(0.0)
+    return penalty.to_dict()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill IntervalAhead and show traffic penalties")
+    parser.add_argument("years", type=int, nargs="*", help="seasons to process (default: every stored season)")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="rewrite sessions that already have the column")
+    parser.add_argument("--circuit", help="print the penalty table of one circuit over the given seasons")
+    args = parser.parse_args()
+
+    written = backfill(args.years or None, args.store, args.force)
+    print(f"{written} session(s) updated in {args.store}")
+    if args.circuit:
+        penalty = circuit_traffic_penalty(args.circuit, args.years, store_dir=args.store)
+        print(pd.Series(penalty, name="TrafficPenalty (s)").sort_values().to_string())
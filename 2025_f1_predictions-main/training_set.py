@@ -0,0 +1,256 @@
+"""
+Multi-season, multi-circuit training matrix.
+
+The scripts train on the ~20 per-driver rows of one prior session. This
+builds one float32 matrix with a row per (session, driver) across every stored
+round and season, with circuit descriptors so a single model can learn across
+tracks. A row's pace features (sector means, clean-air pace, circuit lap time)
+come from the session before it in the weekend (REFERENCE_SESSIONS, e.g.
+qualifying for the race, as the scripts do), never from the laps its lap-time
+target is taken from; rows of sessions without a stored reference have NaN
+there.
+
+    lap_store/training_set/matrix.f32   rows x len(COLUMNS) float32, appended in place
+    lap_store/training_set/meta.json    row count, circuits and the row range of every session
+
+Rows are appended as sessions are stored (ingest.py runs append_round, which
+rewrites only the rows of a re-ingested round), the file is memory-mapped on
+load, and select() slices it by season, circuit and session type, copying only
+the matching rows.
+
+Usage:
+    python training_set.py                       # append every stored session not in the matrix yet
+    data = TrainingSet.load().select(years=[2023, 2024], sessions=["R"])
+    X, y = training_data([2024], target="LapTime (s)")    # one model for the whole season
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from clean_air import NEUTRALISED_STATUS, clean_air_pace
+from fuel import COLUMN as FUEL_COLUMN, has_fuel_correction
+from lap_store import STORE_DIR, find_session, list_sessions, load_laps
+from registry import driver_ids
+from traffic import COLUMN as INTERVAL_COLUMN, has_intervals
+
+TRAINING_NAME = "training_set"
+SESSION_TYPES = ["R", "S", "Q", "SQ", "FP1", "FP2", "FP3"]
+# session whose laps give the pace features of another session's rows
+REFERENCE_SESSIONS = {"R": "Q", "S": "SQ", "Q": "FP3", "FP3": "FP2", "FP2": "FP1"}
+
+KEY_COLUMNS = ["Year", "Round", "Session", "Circuit", "DriverId"]
+PACE_COLUMNS = [
+    "Sector1Time (s)", "Sector2Time (s)", "Sector3Time (s)", "TotalSectorTime (s)", "CleanAirPace (s)",
+]
+FEATURE_COLUMNS = PACE_COLUMNS + [
+    "GridPosition",
+    # circuit descriptors
+    "CircuitLapTime (s)", "SessionLaps", "NeutralisedShare",
+]
+TARGET_COLUMNS = ["LapTime (s)", "FuelCorrectedLapTime (s)", "FinishPosition"]
+COLUMNS = KEY_COLUMNS + FEATURE_COLUMNS + TARGET_COLUMNS
+
+LAP_COLUMNS = ["Driver", "LapNumber", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time",
+               "Time", "PitInTime", "PitOutTime", "TrackStatus"]
+
+
+def _session_key(year, entry):
+    return f"{int(year)}/{entry['round']:02d}_{entry['session']}"
+
+
+def _session_laps(year, round_number, code, store_dir):
+    """Stored laps of a session with the derived columns it has, and the neutralised-lap mask."""
+    columns = list(LAP_COLUMNS)
+    if has_fuel_correction(year, round_number, code, store_dir):
+        columns.append(FUEL_COLUMN)
+    if has_intervals(year, round_number, code, store_dir):
+        columns.append(INTERVAL_COLUMN)
+    laps = load_laps(year, round_number, code, columns, store_dir=store_dir)
+    laps["Driver"] = laps["Driver"].astype(str)
+    neutralised = laps["TrackStatus"].astype(str).str.contains(f"[{NEUTRALISED_STATUS}]", regex=True)
+    return laps, neutralised
+
+
+def pace_features(year, round_number, code, store_dir=STORE_DIR):
+    """(per-driver PACE_COLUMNS, median green-flag lap time) of a stored session; empty and NaN if it is not stored."""
+    if code is None or find_session(year, round_number, code, store_dir)[0] is None:
+        return pd.DataFrame(columns=PACE_COLUMNS, dtype=np.float64), np.nan
+    laps, neutralised = _session_laps(year, round_number, code, store_dir)
+    timed = laps.dropna(subset=["LapTime (s)"])
+    sectors = ["Sector1Time (s)", "Sector2Time (s)", "Sector3Time (s)"]
+    pace = timed.groupby("Driver")[sectors].mean().astype(np.float64)
+    pace["TotalSectorTime (s)"] = pace[sectors].sum(axis=1)
+    pace["CleanAirPace (s)"] = clean_air_pace(laps).set_index("Driver")["CleanAirPace (s)"]
+    return pace, float(timed.loc[~neutralised[timed.index], "LapTime (s)"].median())
+
+
+def session_rows(year, entry, circuit_id, store_dir=STORE_DIR):
+    """Feature and target rows (one per driver) of one stored session, in COLUMNS order."""
+    round_number, code = entry["round"], entry["session"]
+    laps, neutralised = _session_laps(year, round_number, code, store_dir)
+    targets = ["LapTime (s)"] + ([f"{FUEL_COLUMN} (s)"] if f"{FUEL_COLUMN} (s)" in laps.columns else [])
+    rows = laps.dropna(subset=["LapTime (s)"]).groupby("Driver")[targets].mean().astype(np.float64)
+
+    pace, circuit_lap_time = pace_features(year, round_number, REFERENCE_SESSIONS.get(code), store_dir)
+    rows = rows.join(pace)
+
+    if "results" in entry["tables"]:
+        results = load_laps(year, round_number, code, ["Driver", "GridPosition", "Position"], "results",
+                            store_dir, compact=False)
+        results = results.set_index(results["Driver"].astype(str))
+        rows["GridPosition"] = results["GridPosition"].replace(0, np.nan)
+        rows["FinishPosition"] = results["Position"]
+
+    rows["CircuitLapTime (s)"] = circuit_lap_time
+    rows["SessionLaps"] = float(laps["LapNumber"].max())
+    rows["NeutralisedShare"] = float(neutralised.mean()) if len(laps) else np.nan
+    rows["Year"] = year
+    rows["Round"] = round_number
+    rows["Session"] = SESSION_TYPES.index(code) if code in SESSION_TYPES else -1
+    rows["Circuit"] = circuit_id
+    rows["DriverId"] = driver_ids(rows.index)
+    return rows.reindex(columns=COLUMNS).to_numpy(dtype=np.float32)
+
+
+class TrainingSet:
+    """The appended matrix plus the metadata needed to slice it."""
+
+    def __init__(self, store_dir=STORE_DIR, meta=None):
+        self.store_dir = store_dir
+        self.training_dir = os.path.join(store_dir, TRAINING_NAME)
+        self.meta = meta or {"columns": COLUMNS, "rows": 0, "circuits": [], "sessions": {}}
+
+    @property
+    def _matrix_path(self):
+        return os.path.join(self.training_dir, "matrix.f32")
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        path = os.path.join(store_dir, TRAINING_NAME, "meta.json")
+        if not os.path.exists(path):
+            return cls(store_dir)
+        with open(path) as f:
+            meta = json.load(f)
+        if meta["columns"] != COLUMNS:
+            raise ValueError(f"{path} was built with different columns; rebuild it with --rebuild")
+        return cls(store_dir, meta)
+
+    def _write_meta(self):
+        path = os.path.join(self.training_dir, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def matrix(self):
+        """Memory-mapped (rows x COLUMNS) view of the whole matrix."""
+        if not self.meta["rows"]:
+            return np.empty((0, len(COLUMNS)), dtype=np.float32)
+        return np.memmap(self._matrix_path, dtype=np.float32, mode="r", shape=(self.meta["rows"], len(COLUMNS)))
+
+    def circuit_id(self, location):
+        circuits = self.meta["circuits"]
+        if location not in circuits:
+            circuits.append(location)
+        return circuits.index(location)
+
+    def append(self, year, entry):
+        """Append the rows of one stored session; sessions already in the matrix are skipped."""
+        key = _session_key(year, entry)
+        if key in self.meta["sessions"]:
+            return 0
+        rows = session_rows(year, entry, self.circuit_id(entry["location"]), self.store_dir)
+        start = self.meta["rows"]
+        os.makedirs(self.training_dir, exist_ok=True)
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(start * len(COLUMNS) * 4)  # drop rows of an append that never reached meta.json
+            f.write(np.ascontiguousarray(rows).tobytes())
+        self.meta["rows"] = start + len(rows)
+        self.meta["sessions"][key] = [start, self.meta["rows"]]
+        self._write_meta()
+        return len(rows)
+
+    def drop(self, keys):
+        """Remove the rows of the given sessions, moving later rows down. Returns the number of rows removed."""
+        ranges = [self.meta["sessions"].pop(key) for key in keys if key in self.meta["sessions"]]
+        if not ranges:
+            return 0
+        keep = np.ones(self.meta["rows"], dtype=bool)
+        for start, stop in ranges:
+            keep[start:stop] = False
+        kept = np.asarray(self.matrix()[keep])
+        removed_before = np.concatenate([[0], np.cumsum(~keep)])
+        for key, (start, stop) in self.meta["sessions"].items():
+            shift = int(removed_before[start])
+            self.meta["sessions"][key] = [start - shift, stop - shift]
+        with open(self._matrix_path + ".tmp", "wb") as f:
+            f.write(np.ascontiguousarray(kept).tobytes())
+        os.replace(self._matrix_path + ".tmp", self._matrix_path)
+        self.meta["rows"] = len(kept)
+        self._write_meta()
+        return int((~keep).sum())
+
+    def select(self, years=None, circuits=None, sessions=None):
+        """Rows of the given seasons, circuits (location names) and session codes as a DataFrame."""
+        matrix = self.matrix()
+        keep = np.ones(len(matrix), dtype=bool)
+        if years is not None:
+            keep &= np.isin(matrix[:, COLUMNS.index("Year")], list(years))
+        if circuits is not None:
+            ids = [self.meta["circuits"].index(c) for c in circuits if c in self.meta["circuits"]]
+            keep &= np.isin(matrix[:, COLUMNS.index("Circuit")], ids)
+        if sessions is not None:
+            keep &= np.isin(matrix[:, COLUMNS.index("Session")], [SESSION_TYPES.index(s) for s in sessions])
+        frame = pd.DataFrame(np.asarray(matrix[keep]), columns=COLUMNS)
+        frame["Circuit"] = pd.Categorical.from_codes(frame["Circuit"].astype(int), categories=self.meta["circuits"])
+        return frame
+
+
+def build(years=None, store_dir=STORE_DIR, rebuild=False):
+    """Append every stored session that is not in the matrix yet. Returns the number of rows added."""
+    training_set = TrainingSet(store_dir) if rebuild else TrainingSet.load(store_dir)
+    if rebuild and os.path.isdir(training_set.training_dir):
+        training_set._write_meta()  # the old matrix is truncated by the first append
+    return sum(training_set.append(year, entry) for year, entry in list_sessions(years, None, store_dir))
+
+
+def design_matrix(frame, target="LapTime (s)"):
+    """(X, y, groups) from selected rows; groups identify the session (year * 100 + round) for grouped CV."""
+    frame = frame[frame[target].notna()].reset_index(drop=True)
+    X = frame[FEATURE_COLUMNS].copy()
+    X.insert(0, "Circuit", frame["Circuit"].cat.codes)
+    X.insert(1, "Session", frame["Session"])
+    groups = (frame["Year"] * 100 + frame["Round"]).astype(np.int64)
+    return X, frame[target], groups
+
+
+def training_data(years, target="LapTime (s)", circuits=None, sessions=("R",), store_dir=STORE_DIR):
+    """(X, y) over the given seasons for one season-wide model; rows without the target are dropped."""
+    build(years, store_dir)
+    X, y, _ = design_matrix(TrainingSet.load(store_dir).select(years, circuits, sessions), target)
+    return X, y
+
+
+def append_round(year, round_number, codes, store_dir=STORE_DIR):
+    """ingest.py step: (re)write the rows of every stored session of the round; other rounds' rows are kept."""
+    if not codes:
+        return
+    training_set = TrainingSet.load(store_dir)
+    # the whole round, not just `codes`: a session's pace features come from another one (REFERENCE_SESSIONS)
+    entries = [entry for _, entry in list_sessions([year], None, store_dir) if entry["round"] == int(round_number)]
+    training_set.drop([_session_key(year, entry) for entry in entries])
+    for entry in entries:
+        training_set.append(year, entry)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the multi-season training matrix from the lap store")
+    parser.add_argument("years", type=int, nargs="*", help="seasons to add (default: every stored season)")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="start from an empty matrix")
+    args = parser.parse_args()
+    added = build(args.years or None, args.store, args.rebuild)
+    training_set = TrainingSet.load(args.store)
+    print(f"{added} row(s) added, {training_set.meta['rows']} in {training_set.training_dir}")
@@ -0,0 +1,249 @@
+"""
+Hyperparameter search for the model engine, one best config per circuit type.
+
+The scripts hand-pick their settings (learning_rate=0.7 in some, 0.05 with
+max_depth=5 in others). This searches SEARCH_SPACE on the multi-season
+training matrix (training_set.py), restricted to the circuits of one type, for
+models trained on that matrix (not the scripts' per-race frames, which have
+other features):
+
+    random    every sampled config at full size
+    halving   successive halving: all configs with few estimators, the best
+              1/ETA of them with ETA times more, ... up to full size
+
+Configs are scored by mean absolute error under GroupKFold with one group
+per session, so laps of the same race never land on both sides of a split,
+with a median imputer fitted on each training fold for engines that do not
+handle the matrix's missing values themselves. Configs are evaluated in a
+process pool that gets the data once at start-up.
+
+Every finished evaluation is written to tuning/<circuit type>.json, so a run
+stopped by its wall-clock budget (or killed) resumes where it left off as
+long as the training data has not changed. The best config found so far is
+kept in the same file and tuned_params() reads it for the engine it was
+searched with.
+
+Usage:
+    python tuning.py 2023 2024 --budget 3600            # nightly: every circuit type within an hour
+    python tuning.py 2023 2024 --type street --method random
+    model = make_model("hist", **tuned_params("Monaco", "hist", n_estimators=300, learning_rate=0.05), random_state=0)
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import GroupKFold, ParameterSampler
+
+from engines import engine_name, handles_missing, make_model, prepare
+from lap_store import STORE_DIR
+from model_registry import data_hash
+from training_set import TrainingSet, build, design_matrix
+
+TUNING_DIR = "tuning"
+
+SEARCH_SPACE = {
+    "n_estimators": [100, 200, 300, 500],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2, 0.4, 0.7],
+    "max_depth": [2, 3, 4, 5],
+    "min_samples_leaf": [1, 3, 5, 10],
+    "subsample": [0.7, 0.85, 1.0],
+}
+N_CANDIDATES = 27
+N_SPLITS = 5
+ETA = 3
+MIN_ESTIMATORS = 10
+
+# stored Location -> circuit type; anything not listed is "permanent"
+CIRCUIT_TYPES = {
+    "monaco": "street",
+    "marina bay": "street",
+    "baku": "street",
+    "jeddah": "street",
+    "las vegas": "street",
+    "miami": "street",
+    "melbourne": "street",
+    "monza": "high_speed",
+    "spa-francorchamps": "high_speed",
+    "silverstone": "high_speed",
+    "spielberg": "high_speed",
+}
+
+
+def circuit_type(circuit):
+    """Circuit type of a stored location ("Monaco" -> "street")."""
+    return CIRCUIT_TYPES.get(str(circuit).lower(), "permanent")
+
+
+def _checkpoint_path(kind, tuning_dir):
+    return os.path.join(tuning_dir, f"{kind}.json")
+
+
+def load_checkpoint(kind, tuning_dir=TUNING_DIR):
+    path = _checkpoint_path(kind, tuning_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(kind, checkpoint, tuning_dir):
+    os.makedirs(tuning_dir, exist_ok=True)
+    path = _checkpoint_path(kind, tuning_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# worker state, set once per process by _init_worker
+_DATA = {}
+
+
+def _init_worker(X, y, groups, engine, n_splits):
+    _DATA.update(X=X, y=y, groups=groups, engine=engine, n_splits=n_splits)
+
+
+def _evaluate(params):
+    """Mean GroupKFold MAE of one config on the worker's data."""
+    X, y, groups, engine = _DATA["X"], _DATA["y"], _DATA["groups"], _DATA["engine"]
+    n_splits = min(_DATA["n_splits"], len(np.unique(groups)))
+    errors = []
+    for train, test in GroupKFold(n_splits=n_splits).split(X, y, groups):
+        # the matrix keeps NaN (no grid slot, no reference session); impute per fold for engines that need it
+        imputer = None if handles_missing(engine) else SimpleImputer(strategy="median").fit(X.iloc[train])
+        model = make_model(engine, random_state=0, **params)
+        model.fit(prepare(X.iloc[train], imputer, engine), y.iloc[train])
+        errors.append(mean_absolute_error(y.iloc[test], model.predict(prepare(X.iloc[test], imputer, engine))))
+    return float(np.mean(errors))
+
+
+def _rungs(n_candidates, method, eta=ETA):
+    """n_estimators scale of each rung, smallest first."""
+    if method == "random":
+        return [1.0]
+    count = max(1, int(math.log(n_candidates, eta) + 1e-9))
+    return [eta ** -(count - 1 - rung) for rung in range(count)]
+
+
+def _rung_params(config, scale):
+    return {**config, "n_estimators": max(MIN_ESTIMATORS, int(round(config["n_estimators"] * scale)))}
+
+
+def _best(checkpoint, configs, rungs):
+    """(params, score, rung) of the best scored config in the highest rung that has scores."""
+    for rung in reversed(range(len(rungs))):
+        scored = [(score, int(key.split(":")[1])) for key, score in checkpoint["results"].items()
+                  if int(key.split(":")[0]) == rung]
+        if scored:
+            score, index = min(scored)
+            return {"params": _rung_params(configs[index], rungs[rung]), "score": score, "rung": rung}
+    return None
+
+
+def search(kind, years, method="halving", n_candidates=N_CANDIDATES, budget=None, workers=None, engine=None,
+           n_splits=N_SPLITS, seed=0, store_dir=STORE_DIR, tuning_dir=TUNING_DIR):
+    """
+    Search SEARCH_SPACE for the circuits of one type; returns the checkpoint with the best config.
+
+    `budget` is in seconds of wall-clock time. When it runs out no new
+    evaluations are started, the ones running are awaited and the best config
+    so far is kept; the next call resumes from the checkpoint.
+    """
+    if method not in ("random", "halving"):
+        raise ValueError(f"Unknown search method {method!r}, expected 'random' or 'halving'")
+    deadline = time.monotonic() + budget if budget else math.inf
+    engine = engine_name(engine)
+    workers = workers or os.cpu_count()
+
+    build(years, store_dir)
+    training_set = TrainingSet.load(store_dir)
+    circuits = [c for c in training_set.meta["circuits"] if circuit_type(c) == kind]
+    if not circuits:
+        raise FileNotFoundError(f"No stored {kind} circuits for {years}")
+    X, y, groups = design_matrix(training_set.select(years, circuits, ["R"]))
+    if groups.nunique() < 2:
+        raise FileNotFoundError(f"Grouped cross-validation needs at least two stored {kind} races, "
+                                f"found {groups.nunique()}")
+
+    configs = list(ParameterSampler(SEARCH_SPACE, n_candidates, random_state=seed))
+    rungs = _rungs(n_candidates, method)
+    spec = {"data": data_hash(X, y), "engine": engine, "method": method, "n_candidates": n_candidates,
+            "n_splits": n_splits, "seed": seed, "space": SEARCH_SPACE}
+    checkpoint = load_checkpoint(kind, tuning_dir)
+    if checkpoint is None or checkpoint["spec"] != spec:
+        checkpoint = {"spec": spec, "circuits": circuits, "results": {}, "best": None, "finished": False}
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(X, y, groups, engine, n_splits)) as pool:
+        survivors = list(range(len(configs)))
+        for rung, scale in enumerate(rungs):
+            pending = {}
+            todo = [i for i in survivors if f"{rung}:{i}" not in checkpoint["results"]]
+            while todo or pending:
+                # keep every worker busy until the budget runs out
+                while todo and len(pending) < workers and time.monotonic() < deadline:
+                    index = todo.pop(0)
+                    pending[pool.submit(_evaluate, _rung_params(configs[index], scale))] = index
+                if not pending:
+                    break
+                remaining = deadline - time.monotonic()
+                # past the deadline, running evaluations are still awaited so their work is kept
+                done, _ = wait(pending, timeout=remaining if 0 < remaining < math.inf else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    checkpoint["results"][f"{rung}:{pending.pop(future)}"] = future.result()
+                if done:
+                    checkpoint["best"] = _best(checkpoint, configs, rungs)
+                    _save_checkpoint(kind, checkpoint, tuning_dir)
+            if todo:
+                print(f"{kind}: budget used up in rung {rung + 1}/{len(rungs)}, resume to continue")
+                return checkpoint
+            scored = sorted((checkpoint["results"][f"{rung}:{i}"], i) for i in survivors)
+            survivors = [i for _, i in scored[:max(1, len(scored) // ETA)]]
+
+    checkpoint["best"] = _best(checkpoint, configs, rungs)
+    checkpoint["finished"] = True
+    _save_checkpoint(kind, checkpoint, tuning_dir)
+    return checkpoint
+
+
+def tuned_params(circuit, engine=None, tuning_dir=TUNING_DIR, **fallback):
+    """Best searched config for the circuit's type, or `fallback` if that type has not been tuned for this engine."""
+    checkpoint = load_checkpoint(circuit_type(circuit), tuning_dir)
+    if checkpoint is None or checkpoint["best"] is None or checkpoint["spec"]["engine"] != engine_name(engine):
+        return fallback
+    return checkpoint["best"]["params"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the model engine per circuit type")
+    parser.add_argument("years", type=int, nargs="+", help="seasons to train and validate on")
+    parser.add_argument("--type", dest="kinds", action="append", help="circuit type(s) to tune (default: all)")
+    parser.add_argument("--method", choices=["random", "halving"], default="halving")
+    parser.add_argument("--candidates", type=int, default=N_CANDIDATES)
+    parser.add_argument("--budget", type=float, help="wall-clock seconds for the whole run")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--engine", choices=["gbr", "hist"])
+    parser.add_argument("--dir", default=TUNING_DIR)
+    args = parser.parse_args()
+
+    kinds = args.kinds or sorted(set(CIRCUIT_TYPES.values()) | {"permanent"})
+    deadline = time.monotonic() + args.budget if args.budget else None
+    for position, kind in enumerate(kinds):
+        # split what is left of the budget evenly over the remaining types
+        budget = (deadline - time.monotonic()) / (len(kinds) - position) if deadline else None
+        try:
+            checkpoint = search(kind, args.years, args.method, args.candidates, budget, args.workers, args.engine,
+                                tuning_dir=args.dir)
+        except FileNotFoundError as e:  # not enough stored races of this type
+            print(f"{kind}: skipped ({e})")
+            continue
+        best = checkpoint["best"]
+        if best is None:
+            print(f"{kind}: no config evaluated within the budget")
+            continue
+        state = "done" if checkpoint["finished"] else "partial"
+        print(f"{kind} ({state}): MAE {best['score']:.3f}s with {best['params']}")
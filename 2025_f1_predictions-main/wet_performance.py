@@ -0,0 +1,142 @@
+"""
+Wet-performance factors computed from historical wet and dry sessions.
+
+Replaces the hand-curated driver_wet_performance dicts. Every stored session
+is classified wet or dry from its weather Rainfall samples and the share of
+laps run on intermediate/wet tyres, and each driver's pace is expressed
+relative to the field (median green-flag lap / field median). The factor is a
+driver's mean relative pace in wet sessions over their mean relative pace in
+dry ones, so below 1.0 means they gain on the field when it rains, matching
+how prediction5.py multiplies it into the qualifying time.
+
+The per-session result is stored once as the "wet_pace" table next to the
+laps: ingest.py writes it for every new race (write_wet_pace) and the CLI
+backfills sessions that lack it, so wet_factors() is a pure read.
+
+Usage:
+    python wet_performance.py 2022 2023 2024          # store f1_cache, backfill wet_pace, print the factor table
+    driver_wet_performance = driver_wet_factors([2022, 2023, 2024])
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from clean_air import NEUTRALISED_STATUS
+from lap_store import (
+    CACHE_DIR, STORE_DIR, add_table, find_session, ingest_cache, ingest_session, list_sessions, load_history, load_laps,
+)
+from session_loader import load_session, session_available
+
+WET_COMPOUNDS = ["INTERMEDIATE", "WET"]
+# a session is wet when either share reaches its threshold
+RAIN_SHARE = 0.2
+WET_TYRE_SHARE = 0.2
+PACE_COLUMNS = ["Driver", "LapNumber", "LapTime", "PitInTime", "PitOutTime", "Compound", "TrackStatus"]
+
+
+def _rain_share(year, entry, store_dir):
+    """Share of weather samples with rainfall, loading the weather payload if it was never stored."""
+    if "weather" not in entry["tables"]:
+        if not session_available(year, entry["round"], entry["session"], "laps+weather"):
+            return np.nan
+        ingest_session(load_session(year, entry["round"], entry["session"], "laps+weather"), store_dir)
+    weather = load_laps(year, entry["round"], entry["session"], ["Rainfall"], "weather", store_dir)
+    return float(weather["Rainfall"].mean()) if len(weather) else np.nan
+
+
+def session_wet_pace(year, entry, store_dir=STORE_DIR):
+    """Classify one stored session and compute every driver's pace relative to the field."""
+    laps = load_laps(year, entry["round"], entry["session"], PACE_COLUMNS, store_dir=store_dir)
+    status = laps["TrackStatus"].astype(str)
+    green = (
+        laps["LapTime (s)"].notna()
+        & laps["PitInTime (s)"].isna()
+        & laps["PitOutTime (s)"].isna()
+        & (laps["LapNumber"].fillna(0) > 1)
+        & ~status.str.contains(f"[{NEUTRALISED_STATUS}]", regex=True)
+    ).to_numpy()
+    laps = laps[green]
+
+    rain_share = _rain_share(year, entry, store_dir)
+    wet_tyre_share = float(laps["Compound"].isin(WET_COMPOUNDS).mean()) if len(laps) else 0.0
+    wet = bool(wet_tyre_share >= WET_TYRE_SHARE or rain_share >= RAIN_SHARE)
+
+    pace = laps.groupby("Driver", observed=True)["LapTime (s)"].agg(["median", "size"]).reset_index()
+    summary = pd.DataFrame({
+        "Driver": pace["Driver"].astype(str),
+        "RelativePace": (pace["median"] / pace["median"].median()).astype(np.float64),
+        "Laps": pace["size"].astype(np.int64),
+        "Wet": np.full(len(pace), wet),
+        "RainShare": np.full(len(pace), rain_share, dtype=np.float64),
+        "WetTyreShare": np.full(len(pace), wet_tyre_share, dtype=np.float64),
+    })
+    add_table(year, entry["round"], entry["session"], "wet_pace", summary, store_dir)
+    return summary
+
+
+def update_wet_pace(years=None, identifiers=("R",), store_dir=STORE_DIR, force=False):
+    """Write the wet_pace table of every stored session that lacks one. Returns how many were written."""
+    updated = 0
+    for identifier in identifiers:
+        for year, entry in list_sessions(years, identifier, store_dir):
+            if force or "wet_pace" not in entry["tables"]:
+                session_wet_pace(year, entry, store_dir)
+                updated += 1
+    return updated
+
+
+def write_wet_pace(year, round_number, codes, store_dir=STORE_DIR):
+    """ingest.py step: classify a newly stored race."""
+    if "R" in codes:
+        session_wet_pace(year, find_session(year, int(round_number), "R", store_dir)[1], store_dir)
+
+
+def wet_factors(years=None, identifiers=("R",), min_laps=5, store_dir=STORE_DIR):
+    """Per-driver wet/dry relative pace ratio across the stored wet_pace tables of the given seasons."""
+    try:
+        frames = [load_history(years, identifier, table="wet_pace", store_dir=store_dir) for identifier in identifiers]
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No wet_pace tables for {years} in {store_dir}; "
+                                f"run python ingest.py <year> for those seasons first") from None
+    history = pd.concat(frames, ignore_index=True)
+    history = history[history["Laps"] >= min_laps]
+
+    wet = history["Wet"].to_numpy(dtype=bool)
+    drivers, driver_ids = np.unique(history["Driver"].astype(str).to_numpy(), return_inverse=True)
+    pace = history["RelativePace"].to_numpy(dtype=np.float64)
+    wet_count = np.bincount(driver_ids[wet], minlength=len(drivers))
+    dry_count = np.bincount(driver_ids[~wet], minlength=len(drivers))
+    wet_sum = np.bincount(driver_ids[wet], weights=pace[wet], minlength=len(drivers))
+    dry_sum = np.bincount(driver_ids[~wet], weights=pace[~wet], minlength=len(drivers))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = (wet_sum / wet_count) / (dry_sum / dry_count)
+    factors = pd.DataFrame({
+        "Driver": drivers,
+        "WetPerformanceFactor": factor,
+        "WetSessions": wet_count,
+        "DrySessions": dry_count,
+    })
+    return factors[(wet_count > 0) & (dry_count > 0)].sort_values("WetPerformanceFactor").reset_index(drop=True)
+
+
+def driver_wet_factors(years=None, identifiers=("R",), store_dir=STORE_DIR):
+    """{driver: wet performance factor}, the drop-in for the old hardcoded dicts."""
+    factors = wet_factors(years, identifiers, store_dir=store_dir)
+    return dict(zip(factors["Driver"], factors["WetPerformanceFactor"].round(6)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute wet-performance factors from stored sessions")
+    parser.add_argument("years", type=int, nargs="*", help="seasons to use (default: every stored season)")
+    parser.add_argument("--sessions", nargs="+", default=["R"])
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--force", action="store_true", help="reclassify sessions that already have a summary")
+    args = parser.parse_args()
+
+    years = args.years or None
+    ingest_cache(args.cache, args.store)
+    update_wet_pace(years, args.sessions, args.store, args.force)
+    print(wet_factors(years, args.sessions, store_dir=args.store).to_string(index=False))